@@ -0,0 +1,252 @@
+from operator import itemgetter
+
+import numpy as np
+
+from rollups import INTENSITY_LEVELS, intensity_bucket
+
+# Training analytics over a user's full history.
+# Workouts are loaded once into NumPy columns and every metric is computed with array
+# operations (bincount, cumsum, unique, accumulate), never a per-row Python loop.
+
+ROLLING_WEEKS = 4
+MAX_RECENT_RECORDS = 50
+
+# 1970-01-05 is a Monday, so whole weeks counted from it line up with week_start elsewhere
+EPOCH_MONDAY = np.datetime64('1970-01-05', 'D')
+
+# First matching keyword wins; anything unmatched is 'other'
+MUSCLE_GROUP_KEYWORDS = (
+    ('shoulders', ('shoulder', 'overhead', 'military', 'lateral raise', 'arnold', 'shrug')),
+    ('chest', ('bench', 'chest', 'push up', 'pushup', 'push-up', 'fly', 'flye', 'dip')),
+    ('back', ('row', 'pull', 'lat ', 'lats', 'pulldown', 'deadlift', 'chin')),
+    ('legs', ('squat', 'lunge', 'leg', 'calf', 'calves', 'hamstring', 'quad', 'glute', 'hip thrust')),
+    ('arms', ('curl', 'tricep', 'bicep', 'skull', 'hammer')),
+    ('core', ('plank', 'crunch', 'sit up', 'situp', 'sit-up', 'abs', 'core', 'oblique')),
+)
+
+# TO_DAYS() keeps dates as plain integers so they load without building date objects
+LOAD_QUERY = """
+    SELECT TO_DAYS(date), exercise, sets, reps, intensity
+    FROM workouts
+    WHERE user_id = %s
+    ORDER BY date
+"""
+TO_DAYS_EPOCH = 719528  # TO_DAYS('1970-01-01')
+
+
+def muscle_group_for(exercise):
+    name = f" {exercise.lower()} "
+    for group, keywords in MUSCLE_GROUP_KEYWORDS:
+        if any(keyword in name for keyword in keywords):
+            return group
+    return 'other'
+
+
+def _int_column(rows, index):
+    return np.fromiter(map(itemgetter(index), rows), dtype=np.int64, count=len(rows))
+
+
+def _coded_column(rows, index):
+    """
+    Dictionary-code one column of rows: returns (distinct values in first-seen order, codes).
+    The dict and map() run in C, which is several times faster than np.unique on strings.
+    """
+    values = list(map(itemgetter(index), rows))
+    codes = dict.fromkeys(values)
+    for code, value in enumerate(codes):
+        codes[value] = code
+    return list(codes), np.fromiter(map(codes.__getitem__, values), dtype=np.int32, count=len(values))
+
+
+def columns_from_rows(rows):
+    """
+    Turn (TO_DAYS(date), exercise, sets, reps, intensity) tuples into NumPy columns,
+    ordered by day. Exercises are dictionary-coded and intensity is coded by INTENSITY_LEVELS.
+    """
+    if not rows:
+        return None
+
+    # Code the raw strings first, then normalize only the distinct values
+    raw_names, raw_codes = _coded_column(rows, 1)
+    exercise_names, name_codes = np.unique([name.strip().lower() for name in raw_names], return_inverse=True)
+
+    raw_intensities, raw_intensity_codes = _coded_column(rows, 4)
+    intensity_lookup = np.array(
+        [INTENSITY_LEVELS.index(intensity_bucket(value or '')) for value in raw_intensities], dtype=np.int8
+    )
+
+    columns = {
+        "day": (_int_column(rows, 0) - TO_DAYS_EPOCH).astype('datetime64[D]'),
+        "exercise": name_codes.astype(np.int32)[raw_codes],
+        "sets": _int_column(rows, 2),
+        "reps": _int_column(rows, 3),
+        "intensity": intensity_lookup[raw_intensity_codes],
+    }
+
+    # Later steps rely on day order; the load query already provides it
+    if np.any(columns["day"][1:] < columns["day"][:-1]):
+        order = np.argsort(columns["day"], kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+    columns["exercise_names"] = exercise_names
+    return columns
+
+
+def load_workout_columns(cursor, user_id):
+    """
+    Load every workout for a user in columnar form. Expects a tuple (non-dictionary) cursor.
+    """
+    cursor.execute(LOAD_QUERY, (user_id,))
+    return columns_from_rows(cursor.fetchall())
+
+
+def weekly_volume(columns):
+    """
+    Volume (sets x reps) per exercise per week, as an [exercises x weeks] matrix,
+    plus the Monday each column starts on.
+    """
+    week = (columns["day"] - EPOCH_MONDAY).astype(np.int64) // 7
+    first_week = week.min()
+    week_index = week - first_week
+    n_weeks = int(week_index.max()) + 1
+    n_exercises = len(columns["exercise_names"])
+
+    volume = columns["sets"] * columns["reps"]
+    flat = np.bincount(
+        columns["exercise"].astype(np.int64) * n_weeks + week_index,
+        weights=volume,
+        minlength=n_exercises * n_weeks
+    )
+    week_starts = EPOCH_MONDAY + (first_week + np.arange(n_weeks)) * 7
+    return flat.astype(np.int64).reshape(n_exercises, n_weeks), week_starts
+
+
+def rolling_mean(matrix, window=ROLLING_WEEKS):
+    """
+    Trailing mean along the week axis. Early weeks average over the weeks available.
+    """
+    sums = np.cumsum(matrix, axis=1)
+    if matrix.shape[1] > window:
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+    counts = np.minimum(np.arange(1, matrix.shape[1] + 1), window)
+    return sums / counts
+
+
+def week_over_week(matrix):
+    """
+    Change from the previous week; the first week has no change.
+    """
+    return np.diff(matrix, axis=1, prepend=matrix[:, :1])
+
+
+def distinct_day_counts(group_codes, days, n_groups):
+    """
+    Number of distinct training days per group code.
+    """
+    day_index = (days - days.min()).astype(np.int64)
+    span = int(day_index.max()) + 1
+    trained = np.zeros(n_groups * span, dtype=bool)
+    trained[group_codes.astype(np.int64) * span + day_index] = True
+    return trained.reshape(n_groups, span).sum(axis=1)
+
+
+def exercise_order(columns):
+    """
+    Row order grouped by exercise, keeping day order within each exercise.
+    """
+    return np.argsort(columns["exercise"], kind='stable')
+
+
+def personal_records(columns, metric_values, order):
+    """
+    Rows where a metric beats every earlier value for the same exercise.
+    Returns (is_record, previous best, running best) aligned to rows in exercise_order.
+    """
+    exercise = columns["exercise"][order].astype(np.int64)
+    values = metric_values[order]
+
+    # Offsetting each exercise above the previous one lets a single running max reset per exercise
+    offset = exercise * (int(values.max()) + 1)
+    running = np.maximum.accumulate(values + offset) - offset
+
+    first_of_exercise = np.ones(len(order), dtype=bool)
+    first_of_exercise[1:] = exercise[1:] != exercise[:-1]
+    previous = np.empty_like(running)
+    previous[0] = 0
+    previous[1:] = running[:-1]
+
+    is_record = (values > previous) & ~first_of_exercise
+    return is_record, previous, running
+
+
+def compute_analytics(columns, recent_records=MAX_RECENT_RECORDS):
+    """
+    Compute volume trends, rolling averages, week-over-week deltas, training frequency
+    and personal records from workout columns. Returns a JSON-serializable dict.
+    """
+    if columns is None:
+        return {"weeks": [], "exercises": {}, "muscle_groups": {}, "personal_records": []}
+
+    names = columns["exercise_names"]
+    n_exercises = len(names)
+    volume, week_starts = weekly_volume(columns)
+    rolling = rolling_mean(volume)
+    deltas = week_over_week(volume)
+
+    # Frequency per exercise and per muscle group, as distinct training days
+    sessions = distinct_day_counts(columns["exercise"], columns["day"], n_exercises)
+    group_names = np.array([muscle_group_for(name) for name in names])
+    unique_groups, group_of_exercise = np.unique(group_names, return_inverse=True)
+    group_sessions = distinct_day_counts(group_of_exercise[columns["exercise"]], columns["day"], len(unique_groups))
+    n_weeks = volume.shape[1]
+
+    # Personal records by reps in a single entry and by entry volume
+    records = []
+    best = {}
+    order = exercise_order(columns)
+    sorted_exercise = columns["exercise"][order]
+    last_of_exercise = np.ones(len(order), dtype=bool)
+    last_of_exercise[:-1] = sorted_exercise[:-1] != sorted_exercise[1:]
+
+    for metric, values in (("reps", columns["reps"]), ("volume", columns["sets"] * columns["reps"])):
+        is_record, previous, running = personal_records(columns, values, order)
+        record_rows = order[is_record]
+        record_exercises = columns["exercise"][record_rows]
+        record_previous = previous[is_record]
+
+        # The running best on each exercise's last row is its all-time best
+        best[metric] = np.zeros(n_exercises, dtype=np.int64)
+        best[metric][sorted_exercise[last_of_exercise]] = running[last_of_exercise]
+
+        recent = np.argsort(columns["day"][record_rows], kind='stable')[::-1][:recent_records]
+        for i in recent:
+            records.append({
+                "exercise": str(names[record_exercises[i]]),
+                "date": str(columns["day"][record_rows[i]]),
+                "metric": metric,
+                "value": int(values[record_rows[i]]),
+                "previous": int(record_previous[i]),
+            })
+    records.sort(key=lambda record: record["date"], reverse=True)
+
+    exercises = {}
+    for code, name in enumerate(names):
+        exercises[str(name)] = {
+            "muscle_group": str(group_names[code]),
+            "weekly_volume": volume[code].tolist(),
+            "rolling_4wk_volume": np.round(rolling[code], 2).tolist(),
+            "week_over_week": deltas[code].tolist(),
+            "sessions": int(sessions[code]),
+            "sessions_per_week": round(float(sessions[code]) / n_weeks, 2),
+            "best_reps": int(best["reps"][code]),
+            "best_volume": int(best["volume"][code]),
+        }
+
+    return {
+        "weeks": [str(day) for day in week_starts],
+        "exercises": exercises,
+        "muscle_groups": {
+            str(group): {"sessions": int(count), "sessions_per_week": round(float(count) / n_weeks, 2)}
+            for group, count in zip(unique_groups, group_sessions)
+        },
+        "personal_records": records[:recent_records],
+    }
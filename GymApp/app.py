@@ -1,81 +1,215 @@
 from platform import android_ver
 
-from flask import Flask, request, render_template, redirect, url_for, flash, get_flashed_messages
+from flask import Flask, request, render_template as flask_render_template, redirect, url_for, flash, get_flashed_messages, g, jsonify, \
+    Response, stream_template, stream_with_context, session
 import mysql.connector
-import re
-import bcrypt
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, timezone
 import os
-import openai
 from dotenv import load_dotenv
 import json
+import hashlib
+import tempfile
+import time
+from jinja2 import FileSystemBytecodeCache
+
+from analytics import compute_analytics, load_workout_columns
+from db import get_pool, get_read_router, recent_writes
+from feedback import build_feedback_prompt, feedback_cache, feedback_cache_key
+from history import HistoryPage, decode_cursor
+from jobs import JobQueue, QueueFull, current_job
+from llm import llm_flights, stream_llm_feedback
+import metrics
+from rollups import fetch_week_rollup
+import passwords
+from passwords import validate_password
+from profiles import LOGIN_QUERY, profile_cache
+from workout_log import UPSERT_WEEKLY_LOG, encode_workout_log
+from workouts import MAX_BATCH_SIZE, insert_workouts, validate_workout_entry
 
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 app = Flask(__name__)
 
 app.secret_key = os.getenv('SECRET_KEY', 'y0uc4nth4v31tmyb01')
 
+#Compiled templates are kept on disk so cold workers skip recompiling them
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gymapp-jinja-cache'))
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+#Pages whose output never changes are rendered once and served from memory.
+#Browsers revalidate with the ETag unless STATIC_PAGE_MAX_AGE allows them to reuse the page
+#without asking; only raise it if these templates never display flashed messages.
+STATIC_PAGE_MAX_AGE = int(os.getenv('STATIC_PAGE_MAX_AGE', '0'))
+AGE_RANGE = range(15, 101)
+_static_pages = {}
+
+#Workout history paging
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '50'))
+HISTORY_MAX_PAGE_SIZE = 500
+
+#Background feedback generation
+feedback_jobs = JobQueue(
+    workers=int(os.getenv('FEEDBACK_WORKERS', '4')),
+    max_pending=int(os.getenv('FEEDBACK_MAX_PENDING', '100'))
+)
+FEEDBACK_STREAM_TIMEOUT = float(os.getenv('FEEDBACK_STREAM_TIMEOUT', '60'))
+
+#Request timing
+@app.before_request
+def start_request_timing():
+    g.metrics_token = metrics.start_request(request.endpoint or 'unmatched')
+
+@app.after_request
+def finish_request_timing(response):
+    """
+    Attach the request's per-component timings as a Server-Timing header and record its duration.
+    """
+    timings = metrics.current_request()
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing()
+    metrics.finish_request(g.pop('metrics_token', None), request.method, response.status_code)
+    return response
+
+def render_template(template_name, **context):
+    """
+    Flask's render_template, timed for /metrics.
+    """
+    with metrics.timed('template_render'):
+        return flask_render_template(template_name, **context)
+
+def render_static_page(template_name, **context):
+    """
+    Serve a page that renders the same for everyone from memory, with ETag and Last-Modified
+    so repeat visits get a 304. Renders normally while flashed messages are waiting to be shown.
+    """
+    if session.get('_flashes'):
+        return render_template(template_name, **context)
+
+    key = (template_name, request.script_root)
+    page = _static_pages.get(key)
+    if page is None:
+        body = render_template(template_name, **context).encode('utf-8')
+        page = _static_pages[key] = (body, hashlib.sha256(body).hexdigest()[:32],
+                                     datetime.now(timezone.utc).replace(microsecond=0))
+    body, etag, last_modified = page
+
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_PAGE_MAX_AGE
+    if not STATIC_PAGE_MAX_AGE:
+        response.cache_control.must_revalidate = True
+    return response.make_conditional(request)
+
 #Database conneciton function
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user = "root",
-        password = "",
-        database = "gym_tracker"
-    )
-
-def validate_password(password):
-    """
-        Validates a password to ensure it contains:
-        - At least one uppercase letter
-        - At least one lowercase letter
-        - At least one special character
-        - At least one number
-        - Minimum length of 8 characters
-        """
-
-    if (len(password)>=8 and
-        re.search(r"[A-Z]", password) and
-        re.search(r"[a-z]", password) and
-        re.search(r"[0-9]", password) and
-        re.search(r"[!@#$%^&*(),.?\":{}|<>]", password)):
-        return True
-    return False
+    """
+    Return the pooled connection for the current request.
+    The first call checks a connection out of the pool; later calls in the same
+    request reuse it, and it is returned to the pool when the request ends.
+    """
+    if 'db' not in g:
+        g.db = get_pool().connect()
+    return g.db
 
-def hash_password(password):
+def get_read_connection(user_id):
+    """
+    Return a connection for the request's read-only queries about user_id.
+    Reads go to a replica (DB_REPLICA_HOSTS) unless the user wrote within the last
+    DB_READ_YOUR_WRITES_SECONDS, or this request already holds a primary connection.
+    """
+    if 'read_db' in g:
+        return g.read_db
+    if 'db' not in g:
+        force_primary = session.get('db_primary_until', 0) > time.time()
+        replica = get_read_router().connect_replica(user_id, force_primary=force_primary)
+        if replica is not None:
+            g.read_db = replica
+            return replica
+    return get_db_connection()
+
+def release_read_connection():
+    """
+    Return the request's replica connection to the pool before it goes on to write,
+    so a request never holds a replica and a primary connection at once.
     """
-    Hashes a password using bcrypt.
+    conn = g.pop('read_db', None)
+    if conn is not None:
+        conn.close()
+
+def note_user_write(user_id):
+    """
+    Keep user_id's reads on the primary for a while after they changed their data.
+    Recorded in the process and in the session, for browsers served by other workers.
+    """
+    recent_writes.record(user_id)
+    session['db_primary_until'] = time.time() + recent_writes.window
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """
+    Return the request's connections to the pool.
     """
+    for name in ('read_db', 'db'):
+        conn = g.pop(name, None)
+        if conn is not None:
+            conn.close()
 
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed
+def hash_password(password):
+    """
+    Hashes a password using bcrypt at the configured work factor.
+    Runs on the hashing process pool so request threads are not tied up.
+    """
+    return passwords.hash_password(password)
 
 def verify_password(input_password, hashed_password):
     """
     Verifies the input password against the stored hashed password.
+    Runs on the hashing process pool so request threads are not tied up.
     """
-    return bcrypt.checkpw(input_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    return passwords.verify_password(input_password, hashed_password)
 
-def get_llm_response(prompt):
+def upgrade_password_hash(cursor, user_id, password, hashed_password):
     """
-    Get a response from the OpenAI GPT model.
+    Rehash a password stored below the configured work factor.
+    Only called after a successful login, while the plain password is known.
+    Returns True if the hash was replaced; the caller commits.
     """
-    response = openai.ChatCompletion.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a fitness coach providing constructive feedback."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response
+    if not passwords.needs_rehash(hashed_password):
+        return False
+    cursor.execute("UPDATE users SET password = %s WHERE id = %s", (hash_password(password), user_id))
+    passwords.record_rehash()
+    return True
+
+def generate_weekly_feedback(user_id, goal, summary, week_start, week_end):
+    """
+    Background job: generate the week's feedback and save it to weeklyfeedback.
+    The completion is streamed and each piece is published on the job for
+    /track_progress/<user_id>/stream/<job_id>; the full text is saved once it finishes.
+    Runs outside the request, so it checks out its own pooled connection.
+    """
+    job = current_job()
+    pieces = []
+    for piece in stream_llm_feedback(build_feedback_prompt(goal, summary)):
+        pieces.append(piece)
+        if job is not None:
+            job.publish(piece)
+    feedback = "".join(pieces)
+
+    connection = get_pool().connect()
+    try:
+        feedback_cache.put(connection, user_id, week_start, week_end,
+                           feedback_cache_key(goal, summary), feedback)
+    finally:
+        connection.close()
+    return feedback
 
 
-def save_weekly_workout_log(user_id, workouts):
+def save_weekly_workout_log(user_id, summary):
     """
-    Save or update the user's weekly workout log in the database.
+    Save or update the user's weekly workout log (the week's per-exercise rollup) in the database.
     """
     # Establish database connection
     connection = get_db_connection()
@@ -83,29 +217,18 @@ def save_weekly_workout_log(user_id, workouts):
         flash("Failed to connect to the database. Please try again later.")
         return
 
-    # Ensure workouts are JSON-serializable
-    for workout in workouts:
-        if isinstance(workout.get('date'), datetime):
-            workout['date'] = workout['date'].strftime('%Y-%m-%d')
-
     try:
-        # Serialize workouts to JSON
-        workout_log = json.dumps(workouts)
+        # Serialize the weekly summary in the compact column-oriented format
+        workout_log = encode_workout_log(summary)
 
         # Determine the start and end of the current week
         today = datetime.now()
         start_of_week = today - timedelta(days=today.weekday())
         end_of_week = start_of_week + timedelta(days=6)
 
-        query = """
-        INSERT INTO weeklyworkouts (user_id, week_start, week_end, workout_log)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE workout_log = VALUES(workout_log)
-        """
-
         with connection.cursor() as cursor:
             # Execute query
-            cursor.execute(query, (
+            cursor.execute(UPSERT_WEEKLY_LOG, (
                 user_id,
                 start_of_week.strftime('%Y-%m-%d'),
                 end_of_week.strftime('%Y-%m-%d'),
@@ -119,9 +242,6 @@ def save_weekly_workout_log(user_id, workouts):
         flash(f"Database error: {err}")
     except Exception as e:
         flash(f"Unexpected error: {e}")
-    finally:
-        # Close connection
-        connection.close()
 
 #Route: Home Page
 @app.route('/')
@@ -129,18 +249,15 @@ def home():
     """
     Displays the start menu for the Gym Tracker App.
     """
-    return render_template('home.html')
+    return render_static_page('home.html')
 
 @app.route('/main_menu/<int:user_id>', methods=['GET', 'POST'])
 def main_menu(user_id):
-    # Fetch user data from the database
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
     try:
-        # Retrieve user details
-        cursor.execute("SELECT id, name, goal FROM users WHERE id = %s", (user_id,))
-        user_data = cursor.fetchone()
+        # Retrieve user details, from the profile cache when possible
+        user_data = profile_cache.lookup(user_id)
+        if user_data is None:
+            user_data = profile_cache.fetch(get_read_connection(user_id), user_id)
 
         if not user_data:
             flash("User not found. Please log in again.")
@@ -153,10 +270,6 @@ def main_menu(user_id):
         flash(f"Database error: {err}")
         return redirect(url_for('login_user'))
 
-    finally:
-        cursor.close()
-        conn.close()
-
 @app.route('/register')
 def register():
     """
@@ -190,19 +303,16 @@ def register_user():
             if not validate_password(password):
                 flash("Invalid Password: min 8 characters, 1 uppercase, 1 lowercase, "
                       "1 special character, 1 number.")
-                return render_template('register.html', age_range=range(15, 101))
+                return render_template('register.html', age_range=AGE_RANGE)
 
             # Ensure passwords match
             if password != confirm_password:
                 flash("Passwords do not match.")
-                return render_template('register.html', age_range=range(15, 101))
+                return render_template('register.html', age_range=AGE_RANGE)
 
             # Hash password
             hashed_password = hash_password(password)
 
-            # Ensure hashed password is decoded to a string
-            hashed_password = hashed_password.decode('utf-8') if isinstance(hashed_password, bytes) else hashed_password
-
             # Database connection
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -211,7 +321,7 @@ def register_user():
             cursor.execute("SELECT id FROM users WHERE email = %s", (email,))
             if cursor.fetchone():
                 Flask("An account with this email already exists.")
-                return render_template('register.html', age_range=range(15, 101))
+                return render_template('register.html', age_range=AGE_RANGE)
 
             # Insert user into the database
             cursor.execute(
@@ -222,22 +332,22 @@ def register_user():
                 (name, email, age, feet, inches, weight, goal, hashed_password)
             )
             conn.commit()
+            profile_cache.put(cursor.lastrowid, {"id": cursor.lastrowid, "name": name, "goal": goal})
             cursor.close()
-            conn.close()
 
             flash("Registration successful! You can now log in.")
             return redirect(url_for('home'))  # Redirect to login page
 
         except mysql.connector.Error as err:
             flash(f"Database error: {err}")
-            return render_template('register.html', age_range=range(15, 101))
+            return render_template('register.html', age_range=AGE_RANGE)
 
         except ValueError:
             flash("Invalid input. Please ensure all fields are filled correctly.")
-            return render_template('register.html', age_range=range(15, 101))
+            return render_template('register.html', age_range=AGE_RANGE)
 
     # Pass age range to the template
-    return render_template('register.html', age_range=range(15, 101))
+    return render_static_page('register.html', age_range=AGE_RANGE)
 
 @app.route('/login_user', methods = ['GET', 'POST'])
 def login_user():
@@ -250,25 +360,30 @@ def login_user():
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
 
-        #Check if email address exists
-        cursor.execute("SELECT * FROM users WHERE email = %s",(email,))
+        #Check if email address exists; the profile columns warm the cache for the main menu
+        snapshot = profile_cache.snapshot()
+        cursor.execute(LOGIN_QUERY, (email,))
         user = cursor.fetchone()
 
+        cursor.close()
+
         if not user:
-            cursor.close()
-            conn.close()
             return "Invalid email or password."
 
         if not verify_password(password, user['password']):
-            cursor.close()
-            conn.close()
             return "Invalid email or password."
 
+        #Store a stronger hash if the work factor has been raised
+        with conn.cursor() as cursor:
+            if upgrade_password_hash(cursor, user['id'], password, user['password']):
+                conn.commit()
+
         #Successful login
+        profile_cache.put(user['id'], user, snapshot)
         return redirect(url_for('main_menu', user_id=user['id']))
 
     #Render the login from the GET request
-    return render_template('login.html')
+    return render_static_page('login.html')
 
 @app.route('/logout')
 def logout_user():
@@ -279,11 +394,15 @@ def logout_user():
 def log_workout(user_id):
     if request.method == 'POST':
         #Get from data
-        exercise = request.form['exercise']
-        sets = request.form['sets']
-        reps = request.form['reps']
-        intensity = request.form['intensity']
-        workout_date = datetime.now().strftime('%Y-%m-%d')
+        row, errors = validate_workout_entry({
+            'exercise': request.form['exercise'],
+            'sets': request.form['sets'],
+            'reps': request.form['reps'],
+            'intensity': request.form['intensity'],
+        })
+        if errors:
+            flash("Invalid workout: " + " ".join(errors))
+            return render_template('log_workout.html', user_id=user_id)
 
         #Connecto to database
         conn = get_db_connection()
@@ -291,14 +410,9 @@ def log_workout(user_id):
 
         try:
             #Insert workout into database
-            cursor.execute(
-                """
-                INSERT INTO workouts (user_id, date, exercise, sets, reps, intensity)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """,
-                (user_id, workout_date, exercise, sets, reps, intensity)
-            )
+            insert_workouts(cursor, user_id, [row])
             conn.commit()
+            note_user_write(user_id)
             flash("Workout logged succesfully!")
             return redirect(url_for('main_menu', user_id=user_id))
 
@@ -307,27 +421,78 @@ def log_workout(user_id):
 
         finally:
             cursor.close()
-            conn.close()
 
     #Render the workout logging form for GET requests
     return render_template('log_workout.html', user_id=user_id)
 
+@app.route('/log_workouts/<int:user_id>', methods=['POST'])
+def log_workouts_batch(user_id):
+    """
+    Log many workouts in one request and one transaction.
+    Expects JSON {"workouts": [{"exercise", "sets", "reps", "intensity", "date"?}, ...]}.
+    Valid entries are inserted together; the response reports a result per entry.
+    """
+    payload = request.get_json(silent=True)
+    entries = payload.get('workouts') if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Expected a JSON body with a non-empty 'workouts' list."}), 400
+    if len(entries) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} workouts can be logged per request."}), 413
+
+    # Validate every entry before touching the database
+    results = []
+    rows = []
+    for index, entry in enumerate(entries):
+        row, errors = validate_workout_entry(entry, from_json=True)
+        if errors:
+            results.append({"index": index, "status": "invalid", "errors": errors})
+        else:
+            results.append({"index": index, "status": "pending"})
+            rows.append(row)
+
+    if rows:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            insert_workouts(cursor, user_id, rows)
+            conn.commit()
+            note_user_write(user_id)
+            status = "logged"
+        except mysql.connector.Error as err:
+            conn.rollback()
+            app.logger.error("Batch workout insert failed for user %s: %s", user_id, err)
+            status = "failed"
+        finally:
+            cursor.close()
+
+        for result in results:
+            if result["status"] == "pending":
+                result["status"] = status
+
+    logged = sum(1 for result in results if result["status"] == "logged")
+    return jsonify({
+        "logged": logged,
+        "invalid": sum(1 for result in results if result["status"] == "invalid"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "results": results,
+    }), (500 if rows and not logged else 200)
+
 @app.route('/track_progress/<int:user_id>', methods=['GET', 'POST'])
 def track_progress(user_id):
     """
-    Fetch the user's weekly workouts, save the log, and provide AI-generated feedback.
+    Fetch the user's weekly rollup, save the log, and provide AI-generated feedback.
     If no workouts are logged, flash an error message and redirect to the main menu.
+    Clients that accept only JSON get {"feedback", "job_id", "status_url", "stream_url"} instead of the page.
     """
-    conn = get_db_connection()
+    conn = get_read_connection(user_id)
     cursor = conn.cursor(dictionary=True)
 
     try:
         # Check if the user has any logged workouts
-        query = "SELECT COUNT(*) as count FROM workouts WHERE user_id = %s"
-        cursor.execute(query, (user_id,))
+        cursor.execute("SELECT 1 FROM workouts WHERE user_id = %s LIMIT 1", (user_id,))
         result = cursor.fetchone()
 
-        if result['count'] == 0:
+        if not result:
             flash("No workouts logged yet. Please log a workout first.")
             return redirect(url_for('main_menu', user_id=user_id))
 
@@ -337,120 +502,181 @@ def track_progress(user_id):
         end_of_week = start_of_week + timedelta(days=6)
 
         # Retrieve user's goal
-        cursor.execute("SELECT goal FROM users WHERE id = %s", (user_id,))
-        user_goal = cursor.fetchone()
+        user_goal = profile_cache.load(conn, user_id)
 
         if not user_goal:
             flash("User goal not found. Please set a goal first.")
             return redirect(url_for('main_menu', user_id=user_id))
 
-        # Retrieve workouts for the current week
-        cursor.execute("""
-            SELECT * FROM workouts
-            WHERE user_id = %s AND date BETWEEN %s AND %s
-        """, (user_id, start_of_week.strftime('%Y-%m-%d'), end_of_week.strftime('%Y-%m-%d')))
-        workouts = cursor.fetchall()
+        week_start = start_of_week.strftime('%Y-%m-%d')
+        week_end = end_of_week.strftime('%Y-%m-%d')
+
+        # Retrieve the per-exercise rollup for the current week
+        summary = fetch_week_rollup(cursor, user_id, week_start)
 
-        if not workouts:
+        if not summary:
             flash("No workouts logged for this week.")
             return redirect(url_for('main_menu', user_id=user_id))
 
-        # Serialize date fields
-        for workout in workouts:
-            if isinstance(workout['date'], (datetime, date)):
-                workout['date'] = workout['date'].strftime('%Y-%m-%d')
-
-        # Save weekly workout log
-        save_weekly_workout_log(user_id, workouts)
-
-        # Generate feedback using OpenAI
-        workout_log_summary = "\n".join(
-            [f"Exercise: {workout['exercise']}, Sets: {workout['sets']}, Reps: {workout['reps']}"
-             for workout in workouts]
-        )
-
-        prompt = (
-            f"Based on the following workout log, provide constructive feedback for the user:\n\n"
-            f"Goals: {user_goal['goal']}\n\n"
-            f"Weekly Workout Log:\n{workout_log_summary}\n\n"
-            f"Focus on encouragement, areas for improvement, and suggestions for next week."
-        )
-        response = get_llm_response(prompt)
-        feedback = response['choices'][0]['message']['content']
-
-        # Save feedback to the database
-        cursor.execute("""
-            INSERT INTO weeklyfeedback (user_id, week_start, week_end, feedback)
-            VALUES (%s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE feedback = VALUES(feedback)
-        """, (
-            user_id,
-            start_of_week.strftime('%Y-%m-%d'),
-            end_of_week.strftime('%Y-%m-%d'),
-            feedback
-        ))
-        conn.commit()
-
-        flash("Weekly progress tracked and feedback provided!")
-        return render_template('progress_feedback.html', feedback=feedback, user_id=user_id)
+        # Look up cached feedback while the read connection is still held
+        key = feedback_cache_key(user_goal['goal'], summary)
+        feedback = feedback_cache.get(conn, user_id, week_start, key)
 
     except mysql.connector.Error as err:
         flash(f"Database error: {err}")
         return redirect(url_for('main_menu', user_id=user_id))
     finally:
         cursor.close()
-        conn.close()
+
+    # Reads are done; hand back the replica before the save checks out the primary
+    release_read_connection()
+
+    # Save weekly workout log
+    save_weekly_workout_log(user_id, summary)
+
+    # Serve cached feedback straight away; otherwise generate it in the background
+    if feedback is None:
+        try:
+            job = feedback_jobs.submit(
+                (user_id, week_start, key), user_id, generate_weekly_feedback,
+                user_id, user_goal['goal'], summary, week_start, week_end
+            )
+        except QueueFull as e:
+            flash(str(e))
+            return redirect(url_for('main_menu', user_id=user_id))
+
+        status_url = url_for('feedback_status', user_id=user_id, job_id=job.id)
+        stream_url = url_for('feedback_stream', user_id=user_id, job_id=job.id)
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({"feedback": None, "job_id": job.id, "status_url": status_url, "stream_url": stream_url})
+
+        flash("Weekly progress tracked! Your feedback is being generated.")
+        return render_template('progress_feedback.html', feedback=None, user_id=user_id, job_id=job.id,
+                               status_url=status_url, stream_url=stream_url)
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({"feedback": feedback})
+    flash("Weekly progress tracked and feedback provided!")
+    return render_template('progress_feedback.html', feedback=feedback, user_id=user_id)
+
+@app.route('/track_progress/<int:user_id>/status/<job_id>', methods=['GET'])
+def feedback_status(user_id, job_id):
+    """
+    Poll a background feedback job. state is queued, running, done or failed.
+    """
+    job = feedback_jobs.get(job_id)
+    if job is None or job.owner != user_id:
+        return jsonify({"state": "unknown"}), 404
+    return jsonify({"state": job.state, "feedback": job.result, "partial": "".join(job.output), "error": job.error})
+
+@app.route('/track_progress/<int:user_id>/stream/<job_id>', methods=['GET'])
+def feedback_stream(user_id, job_id):
+    """
+    Stream a background feedback job's text as Server-Sent Events.
+    Each "message" event carries {"text": piece}; a final "done" or "failed" event ends the stream.
+    Reconnecting replays the text from the start.
+    """
+    job = feedback_jobs.get(job_id)
+    if job is None or job.owner != user_id:
+        return jsonify({"state": "unknown"}), 404
+
+    def events():
+        streamed = False
+        for piece in job.follow(timeout=FEEDBACK_STREAM_TIMEOUT):
+            streamed = True
+            yield f"data: {json.dumps({'text': piece})}\n\n"
+        if not job.done.is_set():
+            yield f"event: failed\ndata: {json.dumps({'error': 'Timed out waiting for feedback.'})}\n\n"
+            return
+        if not streamed and job.result:
+            yield f"data: {json.dumps({'text': job.result})}\n\n"
+        yield f"event: {job.state}\ndata: {json.dumps({'error': job.error})}\n\n"
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/workout_history/<int:user_id>', methods=['GET'])
 def display_workout_history(user_id):
     """
-    Display the workout history for a specific user.
+    Display one page of the workout history for a specific user, newest first.
+    Pages are keyed by (date, id): ?before=<cursor> fetches the next page, ?page_size=N
+    sets the page size and ?stream=1 streams rows into the template as they are read.
     If no workouts are logged, flash an error message and redirect to the main menu.
     """
-    conn = get_db_connection()
+    page_size = request.args.get('page_size', HISTORY_PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, HISTORY_MAX_PAGE_SIZE))
+    stream = request.args.get('stream') == '1'
+
+    try:
+        before = decode_cursor(request.args['before']) if request.args.get('before') else None
+    except ValueError:
+        flash("Invalid history page requested.")
+        return redirect(url_for('display_workout_history', user_id=user_id))
+
+    conn = get_read_connection(user_id)
     cursor = conn.cursor(dictionary=True)
 
     try:
-        # Check if user has any workout history
-        query = "SELECT COUNT(*) as count FROM workouts WHERE user_id = %s"
-        cursor.execute(query, (user_id,))
-        result = cursor.fetchone()
+        # Fetch one page of workout history
+        page = HistoryPage(cursor, user_id, before=before, limit=page_size)
 
-        if result['count'] == 0:
+        # Check if user has any workout history
+        if page.is_empty() and before is None:
+            cursor.close()
             flash("No workout history available. Please log a workout first.")
             return redirect(url_for('main_menu', user_id=user_id))
 
-        # Fetch workout history
-        cursor.execute("""
-            SELECT date, exercise, sets, reps
-            FROM workouts
-            WHERE user_id = %s
-            ORDER BY date DESC
-        """, (user_id,))
-        workout_history = cursor.fetchall()
+        if stream:
+            def generate():
+                try:
+                    yield from stream_template('workout_history.html', workout_history=page,
+                                               page=page, page_size=page_size, user_id=user_id)
+                finally:
+                    cursor.close()
+
+            return Response(stream_with_context(generate()), mimetype='text/html')
 
-        return render_template('workout_history.html', workout_history=workout_history, user_id=user_id)
+        workout_history = list(page)
+        cursor.close()
+        return render_template('workout_history.html', workout_history=workout_history,
+                               page=page, page_size=page_size, user_id=user_id)
 
     except mysql.connector.Error as err:
+        cursor.close()
         flash(f"Database error: {err}")
         return redirect(url_for('main_menu', user_id=user_id))
+
+@app.route('/analytics/<int:user_id>', methods=['GET'])
+def training_analytics(user_id):
+    """
+    Training analytics over the user's full history: weekly volume per exercise,
+    rolling 4-week averages, week-over-week deltas, training frequency and personal records.
+    """
+    conn = get_read_connection(user_id)
+    cursor = conn.cursor()
+
+    try:
+        columns = load_workout_columns(cursor, user_id)
+        return jsonify(compute_analytics(columns))
+
+    except mysql.connector.Error as err:
+        return jsonify({"error": f"Database error: {err}"}), 500
     finally:
         cursor.close()
-        conn.close()
 
 @app.route('/update_goal/<int:user_id>', methods=['GET', 'POST'])
 def update_fitness_goal(user_id):
     print(f"Accessed update_goal for user_id: {user_id}")  # Debugging
-    connection = get_db_connection()
-    if not connection:
-        flash("Failed to connect to the database. Please try again later.")
-        print("Database connection failed.")  # Debugging
-        return redirect(url_for('home'))
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
         if request.method == 'POST':
+            connection = get_db_connection()
+            if not connection:
+                flash("Failed to connect to the database. Please try again later.")
+                print("Database connection failed.")  # Debugging
+                return redirect(url_for('home'))
+            cursor = connection.cursor(dictionary=True)
+
             print("POST request received.")  # Debugging
             # Get the new goal from the form
             new_goal = request.form['new_goal']
@@ -464,6 +690,8 @@ def update_fitness_goal(user_id):
             """
             cursor.execute(query, (new_goal, user_id))
             connection.commit()
+            note_user_write(user_id)
+            profile_cache.update(user_id, goal=new_goal)
 
             flash("Fitness goal updated successfully!")
             return redirect(url_for('main_menu', user_id=user_id))
@@ -471,9 +699,9 @@ def update_fitness_goal(user_id):
         else:
             print("GET request received.")  # Debugging
             # Fetch the current goal to display in the form
-            query = "SELECT goal FROM users WHERE id = %s"
-            cursor.execute(query, (user_id,))
-            user = cursor.fetchone()
+            user = profile_cache.lookup(user_id)
+            if user is None:
+                user = profile_cache.fetch(get_read_connection(user_id), user_id)
 
             if not user:
                 flash("User not found.")
@@ -493,8 +721,64 @@ def update_fitness_goal(user_id):
     finally:
         if 'cursor' in locals() and cursor:
             cursor.close()
-        if connection.is_connected():
-            connection.close()
+
+@app.route('/pool_stats', methods=['GET'])
+def pool_stats():
+    """
+    Report database pool occupancy and checkout wait times, and where reads were routed.
+    """
+    return jsonify(dict(get_pool().stats(), reads=get_read_router().stats()))
+
+@app.route('/feedback_cache_stats', methods=['GET'])
+def feedback_cache_stats():
+    """
+    Report AI feedback cache hit and miss counters.
+    """
+    return jsonify(dict(feedback_cache.stats(), jobs=feedback_jobs.stats(), llm=llm_flights.stats()))
+
+@app.route('/password_hash_stats', methods=['GET'])
+def password_hash_stats():
+    """
+    Report bcrypt hash and verify timings for tuning the work factor.
+    """
+    return jsonify(passwords.stats())
+
+@app.route('/profile_cache_stats', methods=['GET'])
+def profile_cache_stats():
+    """
+    Report user profile cache hit and miss counters.
+    """
+    return jsonify(profile_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """
+    Expose request and component timing histograms, plus pool, cache and bcrypt gauges,
+    in the Prometheus text format.
+    """
+    pool = get_pool().stats()
+    cache = feedback_cache.stats()
+    jobs = feedback_jobs.stats()
+    hashing = passwords.stats()
+    gauges = [
+        ("gymapp_db_pool_in_use", "Connections checked out of the pool.", pool['in_use']),
+        ("gymapp_db_pool_idle", "Idle pooled connections.", pool['idle']),
+        ("gymapp_db_pool_checkouts", "Connections checked out since start.", pool['checkouts']),
+        ("gymapp_db_pool_timeouts", "Checkouts that timed out waiting for a connection.", pool['timeouts']),
+        ("gymapp_password_rehashed", "Password hashes upgraded on login.", hashing['rehashed']),
+    ]
+    reads = get_read_router().stats()
+    gauges += [(f"gymapp_db_reads_{name}", f"Reads routed: {name.replace('_', ' ')}.", reads[name])
+               for name in ("primary", "replica", "sticky", "replica_errors")]
+    gauges += [(f"gymapp_llm_{name}", f"LLM requests {name.replace('_', ' ')} (single-flight).", value)
+               for name, value in llm_flights.stats().items()]
+    gauges += [(f"gymapp_feedback_cache_{name}", f"Feedback cache {name.replace('_', ' ')}.", value)
+               for name, value in cache.items() if isinstance(value, (int, float))]
+    gauges += [(f"gymapp_profile_cache_{name}", f"Profile cache {name.replace('_', ' ')}.", value)
+               for name, value in profile_cache.stats().items()]
+    gauges += [(f"gymapp_feedback_jobs_{name}", f"Feedback jobs {name.replace('_', ' ')}.", value)
+               for name, value in jobs.items() if isinstance(value, (int, float))]
+    return Response(metrics.render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
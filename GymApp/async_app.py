@@ -0,0 +1,627 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import pymysql
+from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
+from quart import Quart, request, render_template as quart_render_template, redirect, url_for, flash, g, \
+    jsonify, Response, session
+
+import async_db
+from db import recent_writes
+import metrics
+import passwords
+from analytics import columns_from_rows, compute_analytics, LOAD_QUERY
+from feedback import FEEDBACK_LOOKUP_QUERY, FEEDBACK_UPSERT_QUERY, build_feedback_prompt, feedback_cache, \
+    feedback_cache_key
+from history import LoadedHistoryPage, decode_cursor, history_page_query
+from jobs import AsyncJobQueue, QueueFull, current_job
+from llm import astream_llm_feedback
+from passwords import validate_password
+from profiles import LOGIN_QUERY, PROFILE_QUERY, profile_cache
+from rollups import UPSERT_ROLLUP, WEEK_ROLLUP_QUERY, rollup_params, summary_from_rows
+from workout_log import UPSERT_WEEKLY_LOG, encode_workout_log
+from workouts import INSERT_WORKOUT, MAX_BATCH_SIZE, validate_workout_entry
+
+# Async serving mode.
+#
+#   hypercorn async_app:app --bind 0.0.0.0:5000
+#
+# The same routes and templates as app.py, run as coroutines on one event loop with an
+# aiomysql pool (async_db.py), the async OpenAI client and bcrypt awaited on the hashing
+# pool. A request waiting on MySQL or OpenAI holds a coroutine, not a thread.
+# app.py remains the synchronous mode; benchmarks/bench_modes.py compares the two.
+
+load_dotenv()
+
+app = Quart(__name__)
+
+app.secret_key = os.getenv('SECRET_KEY', 'y0uc4nth4v31tmyb01')
+
+#Compiled templates are kept on disk so cold workers skip recompiling them
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'gymapp-jinja-cache'))
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+STATIC_PAGE_MAX_AGE = int(os.getenv('STATIC_PAGE_MAX_AGE', '0'))
+AGE_RANGE = range(15, 101)
+_static_pages = {}
+
+#Workout history paging
+HISTORY_PAGE_SIZE = int(os.getenv('HISTORY_PAGE_SIZE', '50'))
+HISTORY_MAX_PAGE_SIZE = 500
+
+#Background feedback generation; coroutines are cheap, so many more may run at once than in app.py
+feedback_jobs = AsyncJobQueue(
+    concurrency=int(os.getenv('ASYNC_FEEDBACK_CONCURRENCY', '200')),
+    max_pending=int(os.getenv('ASYNC_FEEDBACK_MAX_PENDING', '5000'))
+)
+FEEDBACK_STREAM_TIMEOUT = float(os.getenv('FEEDBACK_STREAM_TIMEOUT', '60'))
+
+#Request timing
+@app.before_request
+async def start_request_timing():
+    g.metrics_token = metrics.start_request(request.endpoint or 'unmatched')
+
+@app.after_request
+async def finish_request_timing(response):
+    timings = metrics.current_request()
+    if timings is not None:
+        response.headers['Server-Timing'] = timings.server_timing()
+    metrics.finish_request(g.pop('metrics_token', None), request.method, response.status_code)
+    return response
+
+async def render_template(template_name, **context):
+    """
+    Quart's render_template, timed for /metrics.
+    """
+    with metrics.timed('template_render'):
+        return await quart_render_template(template_name, **context)
+
+async def render_static_page(template_name, **context):
+    """
+    Serve a page that renders the same for everyone from memory, with ETag and Last-Modified.
+    Renders normally while flashed messages are waiting to be shown.
+    """
+    if session.get('_flashes'):
+        return await render_template(template_name, **context)
+
+    key = (template_name, request.script_root)
+    page = _static_pages.get(key)
+    if page is None:
+        body = (await render_template(template_name, **context)).encode('utf-8')
+        page = _static_pages[key] = (body, hashlib.sha256(body).hexdigest()[:32],
+                                     datetime.now(timezone.utc).replace(microsecond=0))
+    body, etag, last_modified = page
+
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_PAGE_MAX_AGE
+    if not STATIC_PAGE_MAX_AGE:
+        response.cache_control.must_revalidate = True
+    return await response.make_conditional(request)
+
+#Database connection
+async def get_db_connection():
+    """
+    Return the pooled connection for the current request, checking one out on first use.
+    """
+    if 'db' not in g:
+        g.db = await async_db.acquire()
+    return g.db
+
+async def get_read_connection(user_id):
+    """
+    Return a connection for the request's read-only queries about user_id; a replica
+    unless the user wrote recently, as in app.py.
+    """
+    if 'read_db' in g:
+        return g.read_db
+    if 'db' in g:
+        return g.db
+    force_primary = session.get('db_primary_until', 0) > time.time()
+    g.read_db = await async_db.acquire_read(user_id, force_primary=force_primary)
+    return g.read_db
+
+def release_read_connection():
+    """
+    Return the request's replica connection before it goes on to write, as in app.py.
+    """
+    conn = g.pop('read_db', None)
+    if conn is not None:
+        async_db.release(conn)
+
+def note_user_write(user_id):
+    recent_writes.record(user_id)
+    session['db_primary_until'] = time.time() + recent_writes.window
+
+@app.teardown_appcontext
+async def release_db_connection(exception):
+    for name in ('read_db', 'db'):
+        conn = g.pop(name, None)
+        if conn is not None:
+            async_db.release(conn)
+
+async def fetch_one(query, params=(), dictionary=True, read_for=None):
+    """
+    Run a query and return its first row, on a read connection for user read_for if given.
+    """
+    conn = await (get_db_connection() if read_for is None else get_read_connection(read_for))
+    async with conn.cursor(async_db.aiomysql.DictCursor if dictionary else async_db.aiomysql.Cursor) as cursor:
+        await async_db.execute(cursor, query, params)
+        return await cursor.fetchone()
+
+async def fetch_all(query, params=(), dictionary=True, read_for=None):
+    conn = await (get_db_connection() if read_for is None else get_read_connection(read_for))
+    async with conn.cursor(async_db.aiomysql.DictCursor if dictionary else async_db.aiomysql.Cursor) as cursor:
+        await async_db.execute(cursor, query, params)
+        return await cursor.fetchall()
+
+async def execute_write(query, params=()):
+    """
+    Run a write on the request's primary connection and return the new row id, if any.
+    """
+    conn = await get_db_connection()
+    async with conn.cursor() as cursor:
+        await async_db.execute(cursor, query, params)
+        return cursor.lastrowid
+
+async def load_profile(user_id):
+    """
+    The user's cached id, name and goal, read through to the database on a miss.
+    """
+    profile = profile_cache.lookup(user_id)
+    if profile is None:
+        snapshot = profile_cache.snapshot()
+        row = await fetch_one(PROFILE_QUERY, (user_id,), read_for=user_id)
+        profile = profile_cache.loaded(user_id, row, snapshot)
+    return profile
+
+async def upgrade_password_hash(user_id, password, hashed_password):
+    """
+    Rehash a password stored below the configured work factor.
+    Only called after a successful login, while the plain password is known.
+    """
+    if not passwords.needs_rehash(hashed_password):
+        return
+    await execute_write("UPDATE users SET password = %s WHERE id = %s",
+                        (await passwords.hash_password_async(password), user_id))
+    passwords.record_rehash()
+
+async def generate_weekly_feedback(user_id, goal, summary, week_start, week_end):
+    """
+    Background job: stream the week's feedback onto the job and save it to weeklyfeedback.
+    """
+    job = current_job()
+    pieces = []
+    async for piece in astream_llm_feedback(build_feedback_prompt(goal, summary)):
+        pieces.append(piece)
+        job.publish(piece)
+    feedback = "".join(pieces)
+
+    key = feedback_cache_key(goal, summary)
+    conn = await async_db.acquire()
+    try:
+        async with conn.cursor() as cursor:
+            await async_db.execute(cursor, FEEDBACK_UPSERT_QUERY, (user_id, week_start, week_end, feedback, key))
+    finally:
+        async_db.release(conn)
+    feedback_cache.remember(user_id, week_start, key, feedback)
+    return feedback
+
+async def save_weekly_workout_log(user_id, summary):
+    """
+    Save or update the user's weekly workout log (the week's per-exercise rollup) in the database.
+    """
+    today = datetime.now()
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=6)
+    try:
+        await execute_write(UPSERT_WEEKLY_LOG, (
+            user_id,
+            start_of_week.strftime('%Y-%m-%d'),
+            end_of_week.strftime('%Y-%m-%d'),
+            encode_workout_log(summary)
+        ))
+        await flash("Weekly workout log saved!")
+    except pymysql.MySQLError as err:
+        await flash(f"Database error: {err}")
+
+async def insert_workouts(user_id, rows):
+    """
+    Insert validated workout rows and add them to the weekly rollup in one transaction.
+    """
+    conn = await get_db_connection()
+    await conn.begin()
+    try:
+        async with conn.cursor() as cursor:
+            await async_db.executemany(cursor, INSERT_WORKOUT, [(user_id,) + tuple(row) for row in rows])
+            await async_db.executemany(cursor, UPSERT_ROLLUP, rollup_params(user_id, rows))
+        await conn.commit()
+    except pymysql.MySQLError:
+        await conn.rollback()
+        raise
+
+#Route: Home Page
+@app.route('/')
+async def home():
+    """
+    Displays the start menu for the Gym Tracker App.
+    """
+    return await render_static_page('home.html')
+
+@app.route('/main_menu/<int:user_id>', methods=['GET', 'POST'])
+async def main_menu(user_id):
+    try:
+        user_data = await load_profile(user_id)
+        if not user_data:
+            await flash("User not found. Please log in again.")
+            return redirect(url_for('login_user'))
+        return await render_template('main_menu.html', user_data=user_data)
+    except pymysql.MySQLError as err:
+        await flash(f"Database error: {err}")
+        return redirect(url_for('login_user'))
+
+@app.route('/register')
+async def register():
+    return redirect(url_for('register_user'))
+
+@app.route('/login')
+async def login():
+    return redirect(url_for('login_user'))
+
+@app.route('/register_user', methods=['GET', 'POST'])
+async def register_user():
+    if request.method == 'POST':
+        form = await request.form
+        try:
+            name = form['name']
+            email = form['email']
+            password = form['password']
+            confirm_password = form['confirm_password']
+            age = int(form['age'])
+            feet = int(form['feet'])
+            inches = int(form['inches'])
+            weight = float(form['weight'])
+            goal = form['goal']
+
+            if not validate_password(password):
+                await flash("Invalid Password: min 8 characters, 1 uppercase, 1 lowercase, "
+                            "1 special character, 1 number.")
+                return await render_template('register.html', age_range=AGE_RANGE)
+
+            if password != confirm_password:
+                await flash("Passwords do not match.")
+                return await render_template('register.html', age_range=AGE_RANGE)
+
+            hashed_password = await passwords.hash_password_async(password)
+
+            if await fetch_one("SELECT id FROM users WHERE email = %s", (email,)):
+                await flash("An account with this email already exists.")
+                return await render_template('register.html', age_range=AGE_RANGE)
+
+            new_id = await execute_write(
+                """
+                INSERT INTO users (name, email, age, feet, inches, weight, goal, password)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (name, email, age, feet, inches, weight, goal, hashed_password)
+            )
+            profile_cache.put(new_id, {"id": new_id, "name": name, "goal": goal})
+
+            await flash("Registration successful! You can now log in.")
+            return redirect(url_for('home'))
+
+        except pymysql.MySQLError as err:
+            await flash(f"Database error: {err}")
+            return await render_template('register.html', age_range=AGE_RANGE)
+
+        except (KeyError, ValueError):
+            await flash("Invalid input. Please ensure all fields are filled correctly.")
+            return await render_template('register.html', age_range=AGE_RANGE)
+
+    return await render_static_page('register.html', age_range=AGE_RANGE)
+
+@app.route('/login_user', methods=['GET', 'POST'])
+async def login_user():
+    if request.method == 'POST':
+        form = await request.form
+        email = form['email']
+        password = form['password']
+
+        snapshot = profile_cache.snapshot()
+        user = await fetch_one(LOGIN_QUERY, (email,))
+        if not user:
+            return "Invalid email or password."
+
+        if not await passwords.verify_password_async(password, user['password']):
+            return "Invalid email or password."
+
+        await upgrade_password_hash(user['id'], password, user['password'])
+        profile_cache.put(user['id'], user, snapshot)
+        return redirect(url_for('main_menu', user_id=user['id']))
+
+    return await render_static_page('login.html')
+
+@app.route('/logout')
+async def logout_user():
+    await flash("You have been logged out.")
+    return redirect(url_for('login_user'))
+
+@app.route('/log_workout/<int:user_id>', methods=['GET', 'POST'])
+async def log_workout(user_id):
+    if request.method == 'POST':
+        form = await request.form
+        row, errors = validate_workout_entry({
+            'exercise': form['exercise'],
+            'sets': form['sets'],
+            'reps': form['reps'],
+            'intensity': form['intensity'],
+        })
+        if errors:
+            await flash("Invalid workout: " + " ".join(errors))
+            return await render_template('log_workout.html', user_id=user_id)
+
+        try:
+            await insert_workouts(user_id, [row])
+            note_user_write(user_id)
+            await flash("Workout logged succesfully!")
+            return redirect(url_for('main_menu', user_id=user_id))
+        except pymysql.MySQLError as err:
+            await flash(f"Database error: {err}")
+
+    return await render_template('log_workout.html', user_id=user_id)
+
+@app.route('/log_workouts/<int:user_id>', methods=['POST'])
+async def log_workouts_batch(user_id):
+    """
+    Log many workouts in one request and one transaction. Same contract as app.py.
+    """
+    payload = await request.get_json(silent=True)
+    entries = payload.get('workouts') if isinstance(payload, dict) else None
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "Expected a JSON body with a non-empty 'workouts' list."}), 400
+    if len(entries) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} workouts can be logged per request."}), 413
+
+    results = []
+    rows = []
+    for index, entry in enumerate(entries):
+        row, errors = validate_workout_entry(entry, from_json=True)
+        if errors:
+            results.append({"index": index, "status": "invalid", "errors": errors})
+        else:
+            results.append({"index": index, "status": "pending"})
+            rows.append(row)
+
+    if rows:
+        try:
+            await insert_workouts(user_id, rows)
+            note_user_write(user_id)
+            status = "logged"
+        except pymysql.MySQLError as err:
+            app.logger.error("Batch workout insert failed for user %s: %s", user_id, err)
+            status = "failed"
+        for result in results:
+            if result["status"] == "pending":
+                result["status"] = status
+
+    logged = sum(1 for result in results if result["status"] == "logged")
+    return jsonify({
+        "logged": logged,
+        "invalid": sum(1 for result in results if result["status"] == "invalid"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "results": results,
+    }), (500 if rows and not logged else 200)
+
+@app.route('/track_progress/<int:user_id>', methods=['GET', 'POST'])
+async def track_progress(user_id):
+    """
+    Fetch the user's weekly rollup, save the log, and provide AI-generated feedback.
+    Clients that accept only JSON get {"feedback", "job_id", "status_url", "stream_url"} instead of the page.
+    """
+    try:
+        if not await fetch_one("SELECT 1 FROM workouts WHERE user_id = %s LIMIT 1", (user_id,), read_for=user_id):
+            await flash("No workouts logged yet. Please log a workout first.")
+            return redirect(url_for('main_menu', user_id=user_id))
+
+        today = datetime.now()
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+
+        user_goal = await load_profile(user_id)
+        if not user_goal:
+            await flash("User goal not found. Please set a goal first.")
+            return redirect(url_for('main_menu', user_id=user_id))
+
+        week_start = start_of_week.strftime('%Y-%m-%d')
+        week_end = end_of_week.strftime('%Y-%m-%d')
+
+        rows = await fetch_all(WEEK_ROLLUP_QUERY, (user_id, week_start), read_for=user_id)
+        summary = summary_from_rows(rows, list(rows[0].keys()) if rows else [])
+        if not summary:
+            await flash("No workouts logged for this week.")
+            return redirect(url_for('main_menu', user_id=user_id))
+
+        # Look up cached feedback while the read connection is still held
+        key = feedback_cache_key(user_goal['goal'], summary)
+        feedback = feedback_cache.get_memory(user_id, week_start, key)
+        if feedback is None:
+            row = await fetch_one(FEEDBACK_LOOKUP_QUERY, (user_id, week_start, key), dictionary=False,
+                                read_for=user_id)
+            feedback = row[0] if row else None
+            feedback_cache.record_db_lookup(user_id, week_start, key, feedback)
+
+        # Reads are done; hand back the replica before the save checks out the primary
+        release_read_connection()
+        await save_weekly_workout_log(user_id, summary)
+
+        # Serve cached feedback straight away; otherwise generate it in the background
+        if feedback is None:
+            try:
+                job = feedback_jobs.submit(
+                    (user_id, week_start, key), user_id, generate_weekly_feedback,
+                    user_id, user_goal['goal'], summary, week_start, week_end
+                )
+            except QueueFull as e:
+                await flash(str(e))
+                return redirect(url_for('main_menu', user_id=user_id))
+
+            status_url = url_for('feedback_status', user_id=user_id, job_id=job.id)
+            stream_url = url_for('feedback_stream', user_id=user_id, job_id=job.id)
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({"feedback": None, "job_id": job.id, "status_url": status_url, "stream_url": stream_url})
+
+            await flash("Weekly progress tracked! Your feedback is being generated.")
+            return await render_template('progress_feedback.html', feedback=None, user_id=user_id, job_id=job.id,
+                                         status_url=status_url, stream_url=stream_url)
+
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({"feedback": feedback})
+        await flash("Weekly progress tracked and feedback provided!")
+        return await render_template('progress_feedback.html', feedback=feedback, user_id=user_id)
+
+    except pymysql.MySQLError as err:
+        await flash(f"Database error: {err}")
+        return redirect(url_for('main_menu', user_id=user_id))
+
+@app.route('/track_progress/<int:user_id>/status/<job_id>', methods=['GET'])
+async def feedback_status(user_id, job_id):
+    job = feedback_jobs.get(job_id)
+    if job is None or job.owner != user_id:
+        return jsonify({"state": "unknown"}), 404
+    return jsonify({"state": job.state, "feedback": job.result, "partial": "".join(job.output), "error": job.error})
+
+@app.route('/track_progress/<int:user_id>/stream/<job_id>', methods=['GET'])
+async def feedback_stream(user_id, job_id):
+    """
+    Stream a background feedback job's text as Server-Sent Events, as in app.py.
+    """
+    job = feedback_jobs.get(job_id)
+    if job is None or job.owner != user_id:
+        return jsonify({"state": "unknown"}), 404
+
+    async def events():
+        streamed = False
+        async for piece in job.follow(timeout=FEEDBACK_STREAM_TIMEOUT):
+            streamed = True
+            yield f"data: {json.dumps({'text': piece})}\n\n".encode('utf-8')
+        if not job.done.is_set():
+            yield f"event: failed\ndata: {json.dumps({'error': 'Timed out waiting for feedback.'})}\n\n".encode('utf-8')
+            return
+        if not streamed and job.result:
+            yield f"data: {json.dumps({'text': job.result})}\n\n".encode('utf-8')
+        yield f"event: {job.state}\ndata: {json.dumps({'error': job.error})}\n\n".encode('utf-8')
+
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.timeout = None
+    return response
+
+@app.route('/workout_history/<int:user_id>', methods=['GET'])
+async def display_workout_history(user_id):
+    """
+    Display one page of the workout history for a specific user, newest first.
+    Pages are keyed by (date, id) as in app.py; rows are fetched in full rather than streamed.
+    """
+    page_size = request.args.get('page_size', HISTORY_PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, HISTORY_MAX_PAGE_SIZE))
+
+    try:
+        before = decode_cursor(request.args['before']) if request.args.get('before') else None
+    except ValueError:
+        await flash("Invalid history page requested.")
+        return redirect(url_for('display_workout_history', user_id=user_id))
+
+    try:
+        rows = await fetch_all(*history_page_query(user_id, before=before, limit=page_size), read_for=user_id)
+        page = LoadedHistoryPage(rows, limit=page_size)
+
+        if page.is_empty() and before is None:
+            await flash("No workout history available. Please log a workout first.")
+            return redirect(url_for('main_menu', user_id=user_id))
+
+        return await render_template('workout_history.html', workout_history=page.rows,
+                                     page=page, page_size=page_size, user_id=user_id)
+
+    except pymysql.MySQLError as err:
+        await flash(f"Database error: {err}")
+        return redirect(url_for('main_menu', user_id=user_id))
+
+@app.route('/analytics/<int:user_id>', methods=['GET'])
+async def training_analytics(user_id):
+    """
+    Training analytics over the user's full history. The NumPy work runs in a thread
+    so the event loop keeps serving other requests.
+    """
+    try:
+        rows = await fetch_all(LOAD_QUERY, (user_id,), dictionary=False, read_for=user_id)
+    except pymysql.MySQLError as err:
+        return jsonify({"error": f"Database error: {err}"}), 500
+    columns = await asyncio.to_thread(columns_from_rows, list(rows))
+    return jsonify(await asyncio.to_thread(compute_analytics, columns))
+
+@app.route('/update_goal/<int:user_id>', methods=['GET', 'POST'])
+async def update_fitness_goal(user_id):
+    try:
+        if request.method == 'POST':
+            form = await request.form
+            await execute_write("UPDATE users SET goal = %s WHERE id = %s", (form['new_goal'], user_id))
+            note_user_write(user_id)
+            profile_cache.update(user_id, goal=form['new_goal'])
+            await flash("Fitness goal updated successfully!")
+            return redirect(url_for('main_menu', user_id=user_id))
+
+        user = await load_profile(user_id)
+        if not user:
+            await flash("User not found.")
+            return redirect(url_for('home'))
+        return await render_template('update_goal.html', current_goal=user['goal'], user_id=user_id)
+
+    except pymysql.MySQLError as err:
+        await flash(f"Database error: {err}")
+        return redirect(url_for('home'))
+
+@app.route('/pool_stats', methods=['GET'])
+async def pool_stats():
+    return jsonify(async_db.stats())
+
+@app.route('/feedback_cache_stats', methods=['GET'])
+async def feedback_cache_stats():
+    return jsonify(dict(feedback_cache.stats(), jobs=feedback_jobs.stats()))
+
+@app.route('/password_hash_stats', methods=['GET'])
+async def password_hash_stats():
+    return jsonify(passwords.stats())
+
+@app.route('/profile_cache_stats', methods=['GET'])
+async def profile_cache_stats():
+    return jsonify(profile_cache.stats())
+
+@app.route('/metrics', methods=['GET'])
+async def prometheus_metrics():
+    pool = async_db.stats()
+    gauges = [
+        ("gymapp_db_pool_in_use", "Connections checked out of the pool.", pool['in_use']),
+        ("gymapp_db_pool_idle", "Idle pooled connections.", pool['idle']),
+        ("gymapp_password_rehashed", "Password hashes upgraded on login.", passwords.stats()['rehashed']),
+    ]
+    gauges += [(f"gymapp_db_reads_{name}", f"Reads routed: {name.replace('_', ' ')}.", pool['reads'][name])
+               for name in ("primary", "replica", "sticky", "replica_errors")]
+    gauges += [(f"gymapp_feedback_cache_{name}", f"Feedback cache {name.replace('_', ' ')}.", value)
+               for name, value in feedback_cache.stats().items() if isinstance(value, (int, float))]
+    gauges += [(f"gymapp_profile_cache_{name}", f"Profile cache {name.replace('_', ' ')}.", value)
+               for name, value in profile_cache.stats().items()]
+    gauges += [(f"gymapp_feedback_jobs_{name}", f"Feedback jobs {name.replace('_', ' ')}.", value)
+               for name, value in feedback_jobs.stats().items() if isinstance(value, (int, float))]
+    return Response(metrics.render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
+
+if __name__ == '__main__':
+    app.run()
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import logging
+import time
+
+import aiomysql
+import pymysql
+
+import metrics
+from db import db_config_from_env, pool_settings_from_env, recent_writes, replica_configs_from_env
+
+# aiomysql connection pool for the async app (async_app.py).
+# Uses the same DB_* and DB_POOL_* settings as db.py. Connections run in autocommit
+# mode; multi-statement writes open a transaction with begin() and commit it.
+# Read-only queries can go to DB_REPLICA_HOSTS, with the same read-your-writes rule
+# as the sync app (db.ReadRouter).
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = None
+_replica_pools = None
+_next_replica = itertools.count()
+_read_counts = {"primary": 0, "replica": 0, "sticky": 0, "replica_errors": 0}
+_replica_connections = {}  # checked-out replica connection -> its pool
+
+
+async def get_async_pool():
+    """
+    Return the process-wide aiomysql pool, creating it on first use.
+    """
+    global _pool, _pool_lock
+    if _pool is None:
+        if _pool_lock is None:
+            _pool_lock = asyncio.Lock()
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await _create_pool(db_config_from_env())
+    return _pool
+
+
+async def _create_pool(config):
+    settings = pool_settings_from_env()
+    return await aiomysql.create_pool(
+        host=config["host"],
+        port=config.get("port", 3306),
+        user=config["user"],
+        password=config["password"],
+        db=config["database"],
+        minsize=0,
+        maxsize=settings["size"] + settings["max_overflow"],
+        pool_recycle=int(settings["recycle"]),
+        autocommit=True,
+    )
+
+
+async def get_replica_pools():
+    """
+    Return one aiomysql pool per configured replica, creating them on first use.
+    """
+    global _replica_pools
+    if _replica_pools is None:
+        pools = [await _create_pool(config) for config in replica_configs_from_env()]
+        if _replica_pools is None:
+            _replica_pools = pools
+        else:
+            for pool in pools:
+                pool.close()
+    return _replica_pools
+
+
+async def acquire():
+    """
+    Check a connection out of the pool, waiting at most DB_POOL_TIMEOUT seconds.
+    """
+    pool = await get_async_pool()
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(pool.acquire(), pool_settings_from_env()["timeout"])
+    finally:
+        metrics.observe("db_connect", time.perf_counter() - start)
+
+
+async def acquire_read(user_id=None, force_primary=False):
+    """
+    Check a connection out for read-only queries about user_id: a replica when one is
+    configured and reachable and the user has not written recently, else the primary.
+    Hand it back with release() either way.
+    """
+    replicas = await get_replica_pools()
+    if not replicas:
+        _read_counts["primary"] += 1
+        return await acquire()
+    if force_primary or (user_id is not None and recent_writes.is_recent(user_id)):
+        _read_counts["sticky"] += 1
+        return await acquire()
+
+    timeout = pool_settings_from_env()["timeout"]
+    start = next(_next_replica)
+    for offset in range(len(replicas)):
+        replica = replicas[(start + offset) % len(replicas)]
+        try:
+            connection = await asyncio.wait_for(replica.acquire(), timeout)
+        except (pymysql.MySQLError, OSError, asyncio.TimeoutError) as err:
+            _read_counts["replica_errors"] += 1
+            logger.warning("Replica unavailable: %s", err)
+            continue
+        _read_counts["replica"] += 1
+        _replica_connections[connection] = replica
+        return connection
+    _read_counts["primary"] += 1
+    return await acquire()
+
+
+def release(connection):
+    """
+    Return a connection to the pool it came from.
+    """
+    _replica_connections.pop(connection, _pool).release(connection)
+
+
+async def execute(cursor, query, params=()):
+    start = time.perf_counter()
+    try:
+        return await cursor.execute(query, params)
+    finally:
+        metrics.observe("db_query", time.perf_counter() - start)
+
+
+async def executemany(cursor, query, params):
+    start = time.perf_counter()
+    try:
+        return await cursor.executemany(query, params)
+    finally:
+        metrics.observe("db_query", time.perf_counter() - start)
+
+
+def _pool_stats(pool):
+    if pool is None:
+        return {"size": 0, "idle": 0, "in_use": 0, "max_size": 0}
+    return {
+        "size": pool.size,
+        "idle": pool.freesize,
+        "in_use": pool.size - pool.freesize,
+        "max_size": pool.maxsize,
+    }
+
+
+def stats():
+    return dict(_pool_stats(_pool), reads=dict(
+        _read_counts, recent_writers=len(recent_writes), window_seconds=recent_writes.window,
+        replicas=[_pool_stats(pool) for pool in _replica_pools or []]
+    ))
@@ -0,0 +1,94 @@
+import json
+import os
+
+from kivy.core.window import Window
+from kivy.loader import Loader
+
+# Screen backgrounds for the Kivy client.
+#
+# build_assets.py scales every static/images background to each resolution bucket and
+# packs each bucket into a texture atlas (static/atlas/backgrounds-<w>x<h>.atlas).
+# At runtime the bucket that covers the window is chosen, its atlas pages are decoded
+# on Kivy's loader thread, and every screen takes a region of the same page textures.
+# Without built atlases the original full-size images are used.
+
+BACKGROUND_BUCKETS = ((800, 480), (1280, 720), (1920, 1080))
+IMAGE_DIR = os.path.join('static', 'images')
+ATLAS_DIR = os.path.join('static', 'atlas')
+
+
+def atlas_basename(bucket):
+    return f"backgrounds-{bucket[0]}x{bucket[1]}"
+
+
+def pick_bucket(window_size, buckets=BACKGROUND_BUCKETS):
+    """
+    Smallest bucket whose long and short sides cover the window's, or the largest bucket.
+    Backgrounds are stretched to fill the screen, so orientation does not matter.
+    """
+    long_side, short_side = max(window_size), min(window_size)
+    for bucket in buckets:
+        if max(bucket) >= long_side and min(bucket) >= short_side:
+            return bucket
+    return buckets[-1]
+
+
+class BackgroundLoader:
+    """
+    Loads backgrounds into Image widgets without blocking the UI thread.
+    Each atlas page is decoded once and its texture shared by every screen that uses it.
+    """
+
+    def __init__(self, atlas_dir=ATLAS_DIR, image_dir=IMAGE_DIR):
+        self.atlas_dir = atlas_dir
+        self.image_dir = image_dir
+        self._regions = {}  # bucket -> {name: (page path, [x, y, w, h])}
+        self._pages = {}    # page path -> ProxyImage, kept so the texture stays cached
+
+    def _atlas_regions(self, bucket):
+        if bucket not in self._regions:
+            regions = {}
+            path = os.path.join(self.atlas_dir, atlas_basename(bucket) + '.atlas')
+            if os.path.exists(path):
+                with open(path) as f:
+                    meta = json.load(f)
+                for page, ids in meta.items():
+                    page_path = os.path.join(self.atlas_dir, page)
+                    for name, region in ids.items():
+                        regions[name] = (page_path, region)
+            self._regions[bucket] = regions
+        return self._regions[bucket]
+
+    def _fallback_source(self, name):
+        for filename in os.listdir(self.image_dir) if os.path.isdir(self.image_dir) else ():
+            if os.path.splitext(filename)[0].lower() == name:
+                return os.path.join(self.image_dir, filename)
+        return None
+
+    def load(self, image, name):
+        """
+        Show background `name` (an image file stem such as 'home') in an Image widget
+        once it has loaded.
+        """
+        located = self._atlas_regions(pick_bucket(Window.size)).get(name)
+        if located is None:
+            source = self._fallback_source(name)
+            if source:
+                image.source = source
+            return
+
+        page_path, region = located
+        proxy = self._pages.get(page_path)
+        if proxy is None:
+            proxy = self._pages[page_path] = Loader.image(page_path)
+
+        def apply(*args):
+            image.texture = proxy.image.texture.get_region(*region)
+
+        if proxy.loaded:
+            apply()
+        else:
+            proxy.bind(on_load=apply)
+
+
+backgrounds = BackgroundLoader()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import columns_from_rows, compute_analytics
+
+# Benchmark for the analytics module on synthetic history.
+#
+#   python benchmarks/bench_analytics.py --rows 100000 --budget-ms 75
+#
+# Times what /analytics does after the fetch: columns_from_rows on the fetched rows, then
+# compute_analytics. Exits non-zero if the median of the two together is over budget.
+
+EXERCISES = [
+    "Bench Press", "Incline Bench", "Squat", "Front Squat", "Deadlift", "Romanian Deadlift",
+    "Overhead Press", "Lateral Raise", "Barbell Row", "Pull Up", "Lat Pulldown", "Bicep Curl",
+    "Hammer Curl", "Tricep Pushdown", "Skull Crusher", "Leg Press", "Lunge", "Calf Raise",
+    "Plank", "Crunch", "Dip", "Chest Fly", "Hip Thrust", "Face Pull",
+]
+INTENSITIES = ["Low", "Medium", "High", "medium ", "HIGH", "moderate"]
+
+# MySQL TO_DAYS() counts from year 0; Python ordinals count from year 1
+TO_DAYS_OFFSET = 365
+
+
+def synthetic_rows(count, years=10, seed=7):
+    """
+    Rows shaped like analytics.LOAD_QUERY results: (TO_DAYS(date), exercise, sets, reps, intensity).
+    """
+    rng = random.Random(seed)
+    start = (date.today() - timedelta(days=365 * years)).toordinal() + TO_DAYS_OFFSET
+    days = sorted(start + rng.randrange(365 * years) for _ in range(count))
+    return [
+        (day, rng.choice(EXERCISES), rng.randint(1, 6), rng.randint(3, 20), rng.choice(INTENSITIES))
+        for day in days
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark training analytics on synthetic history.")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=75.0, help="Budget for load + compute")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    load_samples, compute_samples, total_samples = [], [], []
+    result = None
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        columns = columns_from_rows(rows)
+        loaded = time.perf_counter()
+        result = compute_analytics(columns)
+        done = time.perf_counter()
+        load_samples.append((loaded - start) * 1000)
+        compute_samples.append((done - loaded) * 1000)
+        total_samples.append((done - start) * 1000)
+
+    total_ms = statistics.median(total_samples)
+    print(f"rows: {args.rows}  exercises: {len(result['exercises'])}  weeks: {len(result['weeks'])}")
+    print(f"columnar load (from fetched rows): median {statistics.median(load_samples):.1f} ms")
+    print(f"compute_analytics: median {statistics.median(compute_samples):.1f} ms")
+    print(f"load + compute: median {total_ms:.1f} ms  min {min(total_samples):.1f} ms  "
+          f"max {max(total_samples):.1f} ms  (budget {args.budget_ms:.0f} ms)")
+
+    if total_ms > args.budget_ms:
+        print("FAIL: over budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
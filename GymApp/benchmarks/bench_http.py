@@ -0,0 +1,284 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# HTTP load benchmark for the Flask app.
+#
+#   python benchmarks/bench_http.py --users 200 --workouts-per-user 500 --concurrency 16 --duration 20
+#   python benchmarks/bench_http.py --compare benchmarks/results/http-<old commit>.json
+#
+# Boots app.py in-process against a local MySQL database (DB_* settings, database
+# gym_tracker_bench by default), seeds it, swaps the OpenAI call for a local fake with
+# --llm-latency-ms of delay, then drives each route at the target concurrency for
+# --duration seconds. Per-route throughput and latency percentiles are written as JSON
+# so runs can be compared between commits. Templates must be present under templates/.
+
+BENCH_PASSWORD = "Bench!Pass1"
+ROUTES = ("login_user", "log_workout", "track_progress", "display_workout_history", "update_fitness_goal")
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up",
+             "Bicep Curl", "Leg Press", "Lunge", "Plank", "Dip", "Lat Pulldown"]
+
+
+def install_fake_llm(latency_ms):
+    """
+    Replace the OpenAI completion call with a local fake that sleeps for latency_ms.
+    """
+    import openai
+
+    text = "Great week. Keep it up!"
+
+    def fake_stream():
+        time.sleep(latency_ms / 1000.0)
+        for word in text.split(" "):
+            yield {"choices": [{"delta": {"content": word + " "}}]}
+
+    def fake_create(model=None, messages=None, stream=False, **kwargs):
+        if stream:
+            return fake_stream()
+        time.sleep(latency_ms / 1000.0)
+        return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+    openai.ChatCompletion.create = fake_create
+
+
+def prepare_database(database, users, workouts_per_user, weeks, reseed):
+    """
+    Create and migrate the benchmark database and seed it if it is empty (or --reseed).
+    """
+    import mysql.connector
+    from db import db_config_from_env, get_pool
+    from passwords import hash_password
+    from schema import migrate
+    from workouts import insert_workouts
+
+    config = db_config_from_env()
+    config.pop("database")
+    server = mysql.connector.connect(**config)
+    server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+    server.close()
+
+    connection = get_pool().connect()
+    cursor = connection.cursor()
+    try:
+        migrate(connection)
+        cursor.execute("SELECT COUNT(*) FROM users")
+        if cursor.fetchone()[0] and not reseed:
+            return
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in ("workout_rollups", "weeklyfeedback", "weeklyworkouts", "workouts", "users"):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+        # Every benchmark user shares one hash, so seeding does not pay for bcrypt per user
+        hashed = hash_password(BENCH_PASSWORD)
+        cursor.executemany(
+            "INSERT INTO users (name, email, age, feet, inches, weight, goal, password) "
+            "VALUES (%s, %s, 30, 5, 10, 170.0, 'Get stronger', %s)",
+            [(f"Bench User {i}", f"bench{i}@example.com", hashed) for i in range(users)]
+        )
+        connection.commit()
+
+        rng = random.Random(11)
+        today = date.today()
+        cursor.execute("SELECT id FROM users ORDER BY id")
+        for (user_id,) in cursor.fetchall():
+            rows = [
+                ((today - timedelta(days=rng.randrange(weeks * 7))).strftime('%Y-%m-%d'),
+                 rng.choice(EXERCISES), rng.randint(2, 5), rng.randint(5, 12),
+                 rng.choice(["Low", "Medium", "High"]))
+                for _ in range(workouts_per_user)
+            ]
+            insert_workouts(cursor, user_id, rows)
+            connection.commit()
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def start_server(host, port):
+    from werkzeug.serving import make_server
+    from app import app
+
+    server = make_server(host, port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def route_request(route, user_id, rng):
+    """
+    Method, path, body and headers for one request to a route.
+    """
+    form = {"Content-Type": "application/x-www-form-urlencoded"}
+    if route == "login_user":
+        body = urlencode({"email": f"bench{user_id - 1}@example.com", "password": BENCH_PASSWORD})
+        return "POST", "/login_user", body, form
+    if route == "log_workout":
+        body = urlencode({"exercise": rng.choice(EXERCISES), "sets": rng.randint(2, 5),
+                          "reps": rng.randint(5, 12), "intensity": "Medium"})
+        return "POST", f"/log_workout/{user_id}", body, form
+    if route == "track_progress":
+        return "GET", f"/track_progress/{user_id}", None, {}
+    if route == "display_workout_history":
+        return "GET", f"/workout_history/{user_id}", None, {}
+    body = urlencode({"new_goal": rng.choice(["Get stronger", "Lose fat", "Run a 5k"])})
+    return "POST", f"/update_goal/{user_id}", body, form
+
+
+def drive_route(host, port, route, user_ids, concurrency, duration):
+    """
+    Hit one route from `concurrency` keep-alive clients for `duration` seconds.
+    Redirects are not followed, so each sample is the route alone.
+    """
+    latencies = []
+    statuses = {}
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(seed):
+        rng = random.Random(seed)
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        local_latencies = []
+        local_statuses = {}
+        local_errors = 0
+        while time.monotonic() < deadline:
+            method, path, body, headers = route_request(route, rng.choice(user_ids), rng)
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+                continue
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+            if status >= 500:
+                local_errors += 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    return summarize(latencies, statuses, errors[0], elapsed)
+
+
+def percentile(ordered, p):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+
+def summarize(latencies, statuses, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 2),
+        "p95_ms": round(percentile(ordered, 0.95), 2),
+        "p99_ms": round(percentile(ordered, 0.99), 2),
+        "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(results, baseline=None):
+    print(f"{'route':<26}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for route, stats in results["routes"].items():
+        line = (f"{route:<26}{stats['throughput_rps']:>9}{stats['p50_ms']:>10}"
+                f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
+        old = (baseline or {}).get("routes", {}).get(route)
+        if old and old["p95_ms"]:
+            line += f"   p95 {100 * (stats['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.0f}%"
+            if old["throughput_rps"]:
+                line += f"  rps {100 * (stats['throughput_rps'] - old['throughput_rps']) / old['throughput_rps']:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for the Flask routes.")
+    parser.add_argument("--database", default="gym_tracker_bench")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--workouts-per-user", type=int, default=300)
+    parser.add_argument("--weeks", type=int, default=52, help="Seeded history spans this many weeks")
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per route")
+    parser.add_argument("--routes", default=",".join(ROUTES))
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--out", help="Results file (default: benchmarks/results/http-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    # Point the app's pool at the benchmark database before anything connects
+    os.environ["DB_NAME"] = args.database
+    os.environ.setdefault("DB_POOL_SIZE", str(args.concurrency))
+
+    install_fake_llm(args.llm_latency_ms)
+    prepare_database(args.database, args.users, args.workouts_per_user, args.weeks, args.reseed)
+    server = start_server("127.0.0.1", args.port)
+
+    user_ids = list(range(1, args.users + 1))
+    results = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+        "routes": {},
+    }
+    try:
+        for route in args.routes.split(","):
+            print(f"Running {route} ...")
+            results["routes"][route] = drive_route("127.0.0.1", args.port, route, user_ids,
+                                                   args.concurrency, args.duration)
+    finally:
+        server.shutdown()
+
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                   f"http-{results['commit']}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    print(f"Results written to {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
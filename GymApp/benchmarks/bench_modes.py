@@ -0,0 +1,325 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_http import current_commit, prepare_database, summarize
+
+# Sync vs async serving mode benchmark.
+#
+#   python benchmarks/bench_modes.py --levels 16,64,256,1024 --duration 20
+#
+# Starts benchmarks/fake_openai.py, then runs app.py (werkzeug, one thread per request)
+# and async_app.py (hypercorn, one coroutine per request) in turn as separate processes
+# against the seeded benchmark database. At each concurrency level every client loops
+# over the progress scenario:
+#
+#   POST /update_goal (a fresh goal, so feedback is never cached)
+#   GET  /track_progress (JSON) -> job with stream_url
+#   GET  stream_url until the final done/failed event
+#
+# Per level the scenario latency percentiles, the time to the first feedback text and
+# the server's peak RSS and thread count are written as JSON.
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MODES = ("sync", "async")
+
+
+def server_command(mode, host, port):
+    if mode == "sync":
+        return [sys.executable, "-c",
+                "from werkzeug.serving import run_simple; from app import app; "
+                f"run_simple({host!r}, {port}, app, threaded=True)"]
+    return [sys.executable, "-m", "hypercorn", "async_app:app", "--bind", f"{host}:{port}"]
+
+
+def start_app(mode, host, port, env):
+    process = subprocess.Popen(server_command(mode, host, port), cwd=APP_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The {mode} server exited with status {process.returncode}.")
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/pool_stats")
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"The {mode} server did not start on port {port}.")
+
+
+def process_tree(pid):
+    """
+    pid and all of its descendants, read from /proc.
+    """
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    parents.setdefault(int(f.read().rsplit(")", 1)[1].split()[1]), []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(parents.get(current, ()))
+    return tree
+
+
+def resource_usage(pid):
+    """
+    Combined RSS (MiB) and thread count of a process tree.
+    """
+    rss_kib = threads = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kib += int(line.split()[1])
+                    elif line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+        except OSError:
+            continue
+    return rss_kib / 1024.0, threads
+
+
+class ResourceSampler(threading.Thread):
+    """
+    Samples the server's memory and thread count while a level runs and keeps the peaks.
+    """
+
+    def __init__(self, pid, interval=0.25):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss_mb = 0.0
+        self.peak_threads = 0
+        self._finished = threading.Event()
+
+    def run(self):
+        while not self._finished.is_set():
+            rss_mb, threads = resource_usage(self.pid)
+            self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+            self.peak_threads = max(self.peak_threads, threads)
+            self._finished.wait(self.interval)
+
+    def stop(self):
+        self._finished.set()
+        self.join()
+
+
+def read_feedback_stream(host, port, path):
+    """
+    Read a feedback SSE stream to its final event.
+    Returns (final event name, perf_counter() when the first text arrived or None).
+    """
+    first_text = None
+    event = "message"
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    try:
+        conn.request("GET", path, headers={"Accept": "text/event-stream"})
+        response = conn.getresponse()
+        if response.status != 200:
+            response.read()
+            return f"http {response.status}", None
+        while True:
+            line = response.readline()
+            if not line:
+                return "closed", first_text
+            line = line.decode("utf-8").rstrip("\r\n")
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                if event in ("done", "failed"):
+                    return event, first_text
+                if first_text is None:
+                    first_text = time.perf_counter()
+    finally:
+        conn.close()
+
+
+def run_scenario(conn, host, port, user_id, rng):
+    """
+    One progress scenario for a user. Returns (outcome, seconds to first feedback text).
+    Outcome is an HTTP status, or "done"/"failed" from the feedback stream.
+    """
+    goal = f"Get stronger {rng.getrandbits(48):x}"
+    conn.request("POST", f"/update_goal/{user_id}", body=urlencode({"new_goal": goal}),
+                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+    response = conn.getresponse()
+    response.read()
+    if response.status >= 400:
+        return str(response.status), None
+
+    started = time.perf_counter()
+    conn.request("GET", f"/track_progress/{user_id}", headers={"Accept": "application/json"})
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 200:
+        return str(response.status), None
+    payload = json.loads(body)
+    if payload.get("feedback") is not None:
+        return "done", time.perf_counter() - started
+
+    event, first_text = read_feedback_stream(host, port, payload["stream_url"])
+    return event, (first_text - started if first_text is not None else None)
+
+
+def drive_level(host, port, user_ids, concurrency, duration):
+    """
+    Run the progress scenario from `concurrency` clients for `duration` seconds.
+    Each client keeps to its own users, so no two clients update the same goal at once.
+    """
+    latencies = []
+    first_texts = []
+    outcomes = {}
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(index):
+        rng = random.Random(index)
+        own_users = user_ids[index::concurrency] or [user_ids[index % len(user_ids)]]
+        conn = http.client.HTTPConnection(host, port, timeout=120)
+        local_latencies, local_first_texts, local_outcomes, local_errors = [], [], {}, 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                outcome, first_text = run_scenario(conn, host, port, rng.choice(own_users), rng)
+            except (OSError, http.client.HTTPException, ValueError, KeyError):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=120)
+                continue
+            local_latencies.append(time.perf_counter() - start)
+            local_outcomes[outcome] = local_outcomes.get(outcome, 0) + 1
+            if first_text is not None:
+                local_first_texts.append(first_text)
+            if outcome != "done":
+                local_errors += 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            first_texts.extend(local_first_texts)
+            errors[0] += local_errors
+            for outcome, count in local_outcomes.items():
+                outcomes[outcome] = outcomes.get(outcome, 0) + count
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    result = summarize(latencies, outcomes, errors[0], elapsed)
+    first = summarize(first_texts, {}, 0, elapsed)
+    result["first_text_p50_ms"] = first["p50_ms"]
+    result["first_text_p95_ms"] = first["p95_ms"]
+    return result
+
+
+def print_report(results):
+    print(f"{'mode':<7}{'clients':>8}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'1st p95':>10}{'errors':>8}{'RSS MiB':>9}{'threads':>9}")
+    for mode, levels in results["modes"].items():
+        for level, stats in levels.items():
+            print(f"{mode:<7}{level:>8}{stats['throughput_rps']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                  f"{stats['p99_ms']:>10}{stats['first_text_p95_ms']:>10}{stats['errors']:>8}"
+                  f"{stats['peak_rss_mb']:>9}{stats['peak_threads']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sync and async serving modes.")
+    parser.add_argument("--database", default="gym_tracker_bench")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--workouts-per-user", type=int, default=100)
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--llm-latency-ms", type=float, default=1500)
+    parser.add_argument("--levels", default="16,64,256", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--sync-feedback-workers", type=int, default=16,
+                        help="FEEDBACK_WORKERS for the sync server")
+    parser.add_argument("--db-pool-size", type=int, default=20)
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--llm-port", type=int, default=5099)
+    parser.add_argument("--out", help="Results file (default: benchmarks/results/modes-<commit>.json)")
+    args = parser.parse_args()
+
+    os.environ["DB_NAME"] = args.database
+    prepare_database(args.database, args.users, args.workouts_per_user, args.weeks, args.reseed)
+
+    levels = [int(level) for level in args.levels.split(",")]
+    env = dict(os.environ,
+               DB_NAME=args.database,
+               DB_POOL_SIZE=str(args.db_pool_size),
+               OPENAI_API_BASE=f"http://127.0.0.1:{args.llm_port}/v1",
+               OPENAI_API_KEY="bench",
+               FEEDBACK_WORKERS=str(args.sync_feedback_workers),
+               FEEDBACK_MAX_PENDING=str(max(levels) * 4),
+               ASYNC_FEEDBACK_MAX_PENDING=str(max(levels) * 4))
+
+    fake_llm = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "fake_openai.py"),
+                                 "--port", str(args.llm_port), "--latency-ms", str(args.llm_latency_ms)])
+    user_ids = list(range(1, args.users + 1))
+    results = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key != "out"},
+        "modes": {},
+    }
+    try:
+        for mode in args.modes.split(","):
+            server = start_app(mode, "127.0.0.1", args.port, env)
+            results["modes"][mode] = {}
+            try:
+                for level in levels:
+                    print(f"Running {mode} with {level} clients ...")
+                    sampler = ResourceSampler(server.pid)
+                    sampler.start()
+                    try:
+                        stats = drive_level("127.0.0.1", args.port, user_ids, level, args.duration)
+                    finally:
+                        sampler.stop()
+                    stats["peak_rss_mb"] = round(sampler.peak_rss_mb, 1)
+                    stats["peak_threads"] = sampler.peak_threads
+                    results["modes"][mode][str(level)] = stats
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        fake_llm.terminate()
+        fake_llm.wait()
+
+    out = args.out or os.path.join(BENCH_DIR, "results", f"modes-{results['commit']}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_report(results)
+    print(f"Results written to {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from workout_log import decode_workout_log, encode_workout_log, _summarize_legacy_rows
+
+# Size and speed comparison of weeklyworkouts.workout_log formats for one heavy week.
+#
+#   python benchmarks/bench_workout_log.py --rows 80 --exercises 12
+
+EXERCISES = [
+    "Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull Up",
+    "Bicep Curl", "Tricep Pushdown", "Leg Press", "Lunge", "Calf Raise", "Plank",
+    "Lat Pulldown", "Dip", "Face Pull", "Hip Thrust",
+]
+
+
+def legacy_rows(count, exercises, seed=3):
+    """
+    Rows as the old save_weekly_workout_log stored them: whole SELECT * dicts.
+    """
+    rng = random.Random(seed)
+    monday = date.today() - timedelta(days=date.today().weekday())
+    return [
+        {
+            "id": 100000 + i,
+            "user_id": 4821,
+            "date": (monday + timedelta(days=rng.randrange(7))).strftime('%Y-%m-%d'),
+            "exercise": rng.choice(EXERCISES[:exercises]),
+            "sets": rng.randint(2, 5),
+            "reps": rng.randint(5, 15),
+            "intensity": rng.choice(["Low", "Medium", "High"]),
+        }
+        for i in range(count)
+    ]
+
+
+def median_us(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare workout_log encodings.")
+    parser.add_argument("--rows", type=int, default=80)
+    parser.add_argument("--exercises", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = legacy_rows(args.rows, args.exercises)
+    summary = _summarize_legacy_rows(rows)
+
+    formats = {
+        "legacy rows (json)": (lambda: json.dumps(rows), json.dumps(rows)),
+        "rollup dicts (json)": (lambda: json.dumps(summary), json.dumps(summary)),
+        "v2 columnar": (lambda: encode_workout_log(summary), encode_workout_log(summary)),
+    }
+
+    print(f"{args.rows} workouts across {len(summary)} exercises")
+    print(f"{'format':<22}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    for name, (encode, encoded) in formats.items():
+        encode_us = median_us(encode, args.repeat)
+        decode_us = median_us(lambda: decode_workout_log(encoded), args.repeat)
+        print(f"{name:<22}{len(encoded.encode('utf-8')):>8}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+    assert decode_workout_log(formats["v2 columnar"][1]) == decode_workout_log(formats["legacy rows (json)"][1])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+# Stand-in for the OpenAI chat completions endpoint, for benchmarks that run the app
+# in a separate process (bench_modes.py). Point the app at it with
+#
+#   OPENAI_API_BASE=http://127.0.0.1:5099/v1
+#
+# Every request waits --latency-ms before answering, like a slow model. Streamed
+# requests get Server-Sent Events ending with "data: [DONE]".
+
+FEEDBACK_TEXT = "Great week. Keep it up!"
+
+
+def completion_body(text):
+    return json.dumps({
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "bench",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }).encode("utf-8")
+
+
+def stream_events(text):
+    for word in text.split(" "):
+        chunk = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "bench",
+            "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+    yield b"data: [DONE]\n\n"
+
+
+async def read_request(reader):
+    """
+    Read one HTTP request; return (method, path, headers, body) or None at end of stream.
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return method, path, headers, body
+
+
+def make_handler(latency):
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if method != "POST" or not path.rstrip("/").endswith("/chat/completions"):
+                    writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+                    await writer.drain()
+                    continue
+
+                stream = bool(json.loads(body or b"{}").get("stream"))
+                await asyncio.sleep(latency)
+                if stream:
+                    # Streams close the connection, so no chunked encoding is needed
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                                 b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+                    for event in stream_events(FEEDBACK_TEXT):
+                        writer.write(event)
+                        await writer.drain()
+                    break
+
+                payload = completion_body(FEEDBACK_TEXT)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             + f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(host, port, latency_ms):
+    server = await asyncio.start_server(make_handler(latency_ms / 1000.0), host, port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--latency-ms", type=float, default=1500)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.latency_ms))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
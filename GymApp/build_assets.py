@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import tempfile
+
+from PIL import Image
+from kivy.atlas import Atlas
+
+from backgrounds import ATLAS_DIR, BACKGROUND_BUCKETS, IMAGE_DIR, atlas_basename
+
+# Asset pipeline for the Kivy client.
+#
+#   python build_assets.py
+#
+# Scales every background in static/images to each resolution bucket and packs each
+# bucket into static/atlas/backgrounds-<w>x<h>.atlas (plus its page PNGs).
+# Run it again whenever a background image changes.
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def background_images(image_dir):
+    return sorted(
+        os.path.join(image_dir, filename) for filename in os.listdir(image_dir)
+        if filename.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def build_bucket(images, bucket, atlas_dir, page_size):
+    """
+    Scale every image to the bucket and pack the results into one atlas.
+    Atlas ids are the lowercased file stems, e.g. 'home' for home.JPG.
+    """
+    with tempfile.TemporaryDirectory() as scaled_dir:
+        scaled = []
+        for path in images:
+            name = os.path.splitext(os.path.basename(path))[0].lower()
+            with Image.open(path) as source:
+                resized = source.convert('RGB').resize(bucket, Image.LANCZOS)
+            target = os.path.join(scaled_dir, name + '.png')
+            resized.save(target)
+            scaled.append(target)
+
+        result = Atlas.create(os.path.join(atlas_dir, atlas_basename(bucket)), scaled, page_size)
+        if not result:
+            raise RuntimeError(f"Backgrounds for {bucket} do not fit in {page_size}px atlas pages.")
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-scale background images and pack them into atlases.")
+    parser.add_argument("--images", default=IMAGE_DIR)
+    parser.add_argument("--out", default=ATLAS_DIR)
+    parser.add_argument("--page-size", type=int, default=2048,
+                        help="Atlas page size in pixels; keep within the devices' maximum texture size")
+    args = parser.parse_args(argv)
+
+    images = background_images(args.images)
+    if not images:
+        print(f"No images found in {args.images}")
+        return 1
+
+    os.makedirs(args.out, exist_ok=True)
+    for bucket in BACKGROUND_BUCKETS:
+        filename, meta = build_bucket(images, bucket, args.out, args.page_size)
+        print(f"{filename}: {len(images)} backgrounds at {bucket[0]}x{bucket[1]} on {len(meta)} page(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
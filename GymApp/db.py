@@ -0,0 +1,421 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+import mysql.connector
+from mysql.connector import errors
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Reads by a user who wrote within this many seconds go to the primary so they see their
+# own write; keep it above the replicas' usual replication lag
+READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+
+def db_config_from_env():
+    """
+    Read MySQL connection settings from the environment.
+    Defaults match the local development database.
+    """
+    return {
+        "host": os.getenv("DB_HOST", "localhost"),
+        "user": os.getenv("DB_USER", "root"),
+        "password": os.getenv("DB_PASSWORD", ""),
+        "database": os.getenv("DB_NAME", "gym_tracker"),
+    }
+
+
+def replica_configs_from_env():
+    """
+    Read read-replica connection settings from DB_REPLICA_HOSTS ("host[:port],...").
+    Replicas use the primary's user, password and database. Empty when unset.
+    """
+    configs = []
+    for entry in os.getenv("DB_REPLICA_HOSTS", "").split(","):
+        host, _, port = entry.strip().partition(":")
+        if not host:
+            continue
+        config = dict(db_config_from_env(), host=host)
+        if port:
+            config["port"] = int(port)
+        configs.append(config)
+    return configs
+
+
+def pool_settings_from_env():
+    """
+    Read connection pool settings from the environment.
+    """
+    return {
+        "size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+        "timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "recycle": float(os.getenv("DB_POOL_RECYCLE", "3600")),
+        "pre_ping": os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False"),
+    }
+
+
+class TimedCursor:
+    """
+    Cursor wrapper that records the time spent in execute() and executemany().
+    """
+
+    def __init__(self, raw):
+        self._raw = raw
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._raw.execute(*args, **kwargs)
+        finally:
+            metrics.observe("db_query", time.perf_counter() - start)
+
+    def executemany(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._raw.executemany(*args, **kwargs)
+        finally:
+            metrics.observe("db_query", time.perf_counter() - start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._raw.close()
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a MySQL connection checked out of a ConnectionPool.
+    Calling close() hands the connection back to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise errors.OperationalError("Connection has already been returned to the pool.")
+        return getattr(raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.__getattr__("cursor")(*args, **kwargs)
+        return TimedCursor(cursor) if metrics.METRICS_ENABLED else cursor
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._release(raw)
+
+    def is_connected(self):
+        return self._raw is not None and self._raw.is_connected()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections.
+
+    size         - connections kept open while idle
+    max_overflow - extra connections opened under load and closed on release
+    timeout      - seconds to wait for a free connection before raising PoolError
+    recycle      - connections idle for longer than this many seconds are reopened
+    pre_ping     - check a connection is still alive before handing it out
+    """
+
+    def __init__(self, connect_args, size=5, max_overflow=10, timeout=30.0, recycle=3600, pre_ping=True):
+        self.connect_args = dict(connect_args)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._cond = threading.Condition()
+        self._idle = []  # (connection, last_released) pairs, most recent last
+        self._opened = 0
+
+        # Checkout wait statistics
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    def _connect(self):
+        return mysql.connector.connect(**self.connect_args)
+
+    def _is_alive(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except errors.Error:
+            return False
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except errors.Error:
+            pass
+
+    def connect(self):
+        """
+        Check a connection out of the pool, opening a new one if there is room.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        raw = None
+        last_used = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    break
+                if self._opened < self.size + self.max_overflow:
+                    self._opened += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise errors.PoolError(
+                        f"Timed out after {self.timeout}s waiting for a database connection."
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            if raw is None:
+                raw = self._connect()
+            elif self.recycle and time.monotonic() - last_used > self.recycle:
+                self._discard(raw)
+                raw = self._connect()
+            elif self.pre_ping and not self._is_alive(raw):
+                self._discard(raw)
+                raw = self._connect()
+        except Exception:
+            # The slot reserved above is no longer backed by a connection
+            with self._cond:
+                self._opened -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        self._record_wait(waited)
+        metrics.observe("db_connect", waited)
+        return PooledConnection(self, raw)
+
+    def _release(self, raw):
+        """
+        Return a connection to the pool, or close it if the pool is already full.
+        """
+        try:
+            if raw.is_connected() and raw.in_transaction:
+                raw.rollback()
+            alive = raw.is_connected()
+        except errors.Error:
+            alive = False
+
+        with self._cond:
+            if alive and len(self._idle) < self.size:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            else:
+                self._opened -= 1
+            self._cond.notify()
+
+        if raw is not None:
+            self._discard(raw)
+
+    def _record_wait(self, waited):
+        with self._cond:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._recent_waits.append(waited)
+
+    def stats(self):
+        """
+        Report pool occupancy and checkout wait times (in milliseconds) for sizing the pool.
+        """
+        with self._cond:
+            recent = sorted(self._recent_waits)
+            idle = len(self._idle)
+            opened = self._opened
+            checkouts = self._checkouts
+            timeouts = self._timeouts
+            total_wait = self._total_wait
+            max_wait = self._max_wait
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000
+
+        return {
+            "size": self.size,
+            "max_overflow": self.max_overflow,
+            "opened": opened,
+            "idle": idle,
+            "in_use": opened - idle,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms_avg": (total_wait / checkouts * 1000) if checkouts else 0.0,
+            "wait_ms_p50": percentile(0.50),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_max": max_wait * 1000,
+        }
+
+    def dispose(self):
+        """
+        Close every idle connection. Checked-out connections are closed when released.
+        """
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+        for raw, _ in idle:
+            self._discard(raw)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(db_config_from_env(), **pool_settings_from_env())
+    return _pool
+
+
+class RecentWrites:
+    """
+    Users who wrote within the last `window` seconds, whose reads should stay on the
+    primary until the replicas have caught up. Bounded; the oldest entries go first.
+    """
+
+    def __init__(self, window=READ_YOUR_WRITES_SECONDS, max_entries=100000):
+        self.window = window
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._until = OrderedDict()  # user_id -> monotonic deadline, oldest first
+
+    def record(self, user_id):
+        with self._lock:
+            self._until.pop(user_id, None)
+            self._until[user_id] = time.monotonic() + self.window
+            while len(self._until) > self.max_entries:
+                self._until.popitem(last=False)
+
+    def is_recent(self, user_id):
+        with self._lock:
+            until = self._until.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._until[user_id]
+                return False
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._until)
+
+
+recent_writes = RecentWrites()
+
+
+class ReadRouter:
+    """
+    Chooses where read-only queries go.
+
+    Reads go to the replica pools in turn. They stay on the primary when no replicas
+    are configured, when the user wrote recently (see RecentWrites) or when the caller
+    forces it. A replica that cannot hand out a connection is skipped for that read,
+    and when none can, the read falls back to the primary.
+    """
+
+    def __init__(self, replicas, writes=None):
+        self.replicas = list(replicas)
+        self.writes = writes if writes is not None else recent_writes
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._counts = {"primary": 0, "replica": 0, "sticky": 0, "replica_errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def connect_replica(self, user_id=None, force_primary=False):
+        """
+        Check out a replica connection for read-only queries about user_id,
+        or return None if the read should use the primary.
+        """
+        if not self.replicas:
+            self._count("primary")
+            return None
+        if force_primary or (user_id is not None and self.writes.is_recent(user_id)):
+            self._count("sticky")
+            return None
+
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            try:
+                connection = replica.connect()
+            except errors.Error as err:
+                self._count("replica_errors")
+                logger.warning("Replica %s unavailable: %s", replica.connect_args.get("host"), err)
+                continue
+            self._count("replica")
+            return connection
+        self._count("primary")
+        return None
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return dict(counts, recent_writers=len(self.writes), window_seconds=self.writes.window,
+                    replicas=[dict(replica.stats(), host=replica.connect_args.get("host"))
+                              for replica in self.replicas])
+
+
+_router = None
+
+
+def get_read_router():
+    """
+    Return the process-wide read router, creating it (and the replica pools) on first use.
+    """
+    global _router
+    if _router is None:
+        with _pool_lock:
+            if _router is None:
+                settings = pool_settings_from_env()
+                _router = ReadRouter([ConnectionPool(config, **settings) for config in replica_configs_from_env()])
+    return _router
@@ -0,0 +1,301 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompt wording or the model changes, so cached feedback is regenerated.
+PROMPT_VERSION = 3
+
+# Prompts longer than this many tokens are compacted. 0 disables compaction.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "600"))
+
+_encoding = tiktoken.get_encoding("cl100k_base") if tiktoken is not None else None
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def format_intensity(intensity):
+    """
+    Describe an intensity distribution such as {'high': 2, 'low': 1} as "2 high, 1 low".
+    """
+    return ", ".join(f"{count} {level}" for level, count in intensity.items() if count) or "not recorded"
+
+
+def count_tokens(text):
+    """
+    Count prompt tokens locally: with tiktoken when it is installed, otherwise by
+    counting words and punctuation, which tracks GPT tokenization closely for English.
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _exercise_line(w):
+    return (
+        f"Exercise: {w['exercise']}, Sessions: {w['session_count']}, Sets: {w['total_sets']}, "
+        f"Reps: {w['total_reps']}, Intensity: {format_intensity(w['intensity'])}"
+    )
+
+
+def _compact_exercise_line(w):
+    levels = [level for level, count in w['intensity'].items() if count]
+    dominant = max(levels, key=lambda level: w['intensity'][level]) if levels else "n/a"
+    return f"{w['exercise']}: {w['session_count']}d {w['total_sets']}x{w['total_reps']} {dominant}"
+
+
+def _others_line(rest, max_names=20):
+    names = ", ".join(str(w['exercise']) for w in rest[:max_names])
+    more = f" and {len(rest) - max_names} more" if len(rest) > max_names else ""
+    return f"Also trained: {names}{more}"
+
+
+def _render_prompt(goal, lines):
+    workouts_summary = "\n".join(lines)
+    return (
+        f"Based on the following workout log, provide constructive feedback for the user:\n\n"
+        f"Goals: {goal}\n\n"
+        f"Weekly Workout Log:\n{workouts_summary}\n\n"
+        f"Focus on encouragement, areas for improvement, and suggestions for next week."
+    )
+
+
+def build_feedback_prompt(goal, summary, token_budget=None):
+    """
+    Build the weekly feedback prompt shared by the web app and the Kivy client
+    from the week's per-exercise rollup.
+
+    Prompts over the token budget are compacted: week totals, then exercises in
+    order of volume on short lines, with whatever still does not fit named on a
+    single "Also trained" line.
+    """
+    budget = PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    prompt = _render_prompt(goal, [_exercise_line(w) for w in summary])
+    full_tokens = count_tokens(prompt)
+    if not budget or full_tokens <= budget:
+        return prompt
+
+    ranked = sorted(summary, key=lambda w: (-int(w['volume']), -int(w['session_count']), str(w['exercise'])))
+    totals = (
+        f"Week totals: {len(summary)} exercises, {sum(int(w['total_sets']) for w in summary)} sets, "
+        f"{sum(int(w['total_reps']) for w in summary)} reps (format: exercise: days sets x reps main intensity)"
+    )
+    base_tokens = count_tokens(_render_prompt(goal, [totals]))
+    line_tokens = [count_tokens(_compact_exercise_line(w)) + 1 for w in ranked]
+
+    # Keep the longest prefix of ranked exercises that fits alongside the "Also trained" line
+    used = base_tokens
+    keep = 0
+    while keep < len(ranked):
+        rest = ranked[keep + 1:]
+        others = count_tokens(_others_line(rest)) + 1 if rest else 0
+        if used + line_tokens[keep] + others > budget:
+            break
+        used += line_tokens[keep]
+        keep += 1
+
+    lines = [totals] + [_compact_exercise_line(w) for w in ranked[:keep]]
+    if ranked[keep:]:
+        lines.append(_others_line(ranked[keep:]))
+    prompt = _render_prompt(goal, lines)
+
+    compact_tokens = count_tokens(prompt)
+    logger.info(
+        "Feedback prompt compacted from %d to %d tokens (budget %d, %d of %d exercises listed)",
+        full_tokens, compact_tokens, budget, keep, len(summary)
+    )
+    if compact_tokens > budget:
+        logger.warning("Feedback prompt is still %d tokens over its budget", compact_tokens - budget)
+    return prompt
+
+
+def normalize_weekly_summary(summary):
+    """
+    Reduce the week's rollup to the fields that affect feedback, in a stable order.
+    """
+    return sorted(
+        [
+            str(w['exercise']).strip(),
+            int(w['session_count']),
+            int(w['total_sets']),
+            int(w['total_reps']),
+            sorted(w['intensity'].items()),
+        ]
+        for w in summary
+    )
+
+
+def feedback_cache_key(goal, summary, prompt_version=PROMPT_VERSION):
+    """
+    Hash (goal, normalized weekly summary, prompt version and token budget) into a content address.
+    """
+    payload = json.dumps(
+        [prompt_version, PROMPT_TOKEN_BUDGET, (goal or '').strip(), normalize_weekly_summary(summary)],
+        separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+FEEDBACK_LOOKUP_QUERY = """
+    SELECT feedback FROM weeklyfeedback
+    WHERE user_id = %s AND week_start = %s AND input_hash = %s
+"""
+
+FEEDBACK_UPSERT_QUERY = """
+    INSERT INTO weeklyfeedback (user_id, week_start, week_end, feedback, input_hash)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE feedback = VALUES(feedback), input_hash = VALUES(input_hash)
+"""
+
+
+class FeedbackCache:
+    """
+    Two-tier cache for AI weekly feedback.
+
+    The first tier is an in-process LRU keyed by (user, week, content hash). The second
+    is the weeklyfeedback table, whose input_hash column records which inputs produced
+    the stored feedback. Feedback is only regenerated when neither tier has the hash.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def _remember(self, entry, feedback):
+        with self._lock:
+            self._entries[entry] = feedback
+            self._entries.move_to_end(entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _lookup_memory(self, entry):
+        with self._lock:
+            feedback = self._entries.get(entry)
+            if feedback is not None:
+                self._entries.move_to_end(entry)
+                self.memory_hits += 1
+            return feedback
+
+    def _lookup_db(self, connection, user_id, week_start, key):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(FEEDBACK_LOOKUP_QUERY, (user_id, week_start, key))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return row[0] if row else None
+
+    def get_memory(self, user_id, week_start, key):
+        """
+        Return feedback from the in-process tier only, or None.
+        """
+        return self._lookup_memory((user_id, str(week_start), key))
+
+    def record_db_lookup(self, user_id, week_start, key, feedback):
+        """
+        Count a database-tier lookup and remember what it found.
+        Used directly by callers that query weeklyfeedback through another driver.
+        """
+        with self._lock:
+            if feedback is None:
+                self.misses += 1
+            else:
+                self.db_hits += 1
+        if feedback is not None:
+            self._remember((user_id, str(week_start), key), feedback)
+
+    def remember(self, user_id, week_start, key, feedback):
+        self._remember((user_id, str(week_start), key), feedback)
+
+    def get(self, connection, user_id, week_start, key):
+        """
+        Return cached feedback for the key, or None.
+        """
+        feedback = self.get_memory(user_id, week_start, key)
+        if feedback is not None:
+            return feedback
+
+        feedback = self._lookup_db(connection, user_id, week_start, key)
+        self.record_db_lookup(user_id, week_start, key, feedback)
+        return feedback
+
+    def put(self, connection, user_id, week_start, week_end, key, feedback):
+        """
+        Store feedback in both tiers.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(FEEDBACK_UPSERT_QUERY, (user_id, week_start, week_end, feedback, key))
+            connection.commit()
+        finally:
+            cursor.close()
+        self.remember(user_id, week_start, key, feedback)
+
+    def get_or_generate(self, connection, user_id, goal, summary, week_start, week_end, generate):
+        """
+        Return feedback for the week, calling generate(prompt) only on a cache miss.
+        """
+        key = feedback_cache_key(goal, summary)
+        feedback = self.get(connection, user_id, week_start, key)
+        if feedback is None:
+            feedback = generate(build_feedback_prompt(goal, summary))
+            self.put(connection, user_id, week_start, week_end, key, feedback)
+        return feedback
+
+    def get_or_stream(self, connection, user_id, goal, summary, week_start, week_end, generate_stream, on_text,
+                      cancelled=None):
+        """
+        Like get_or_generate, but passes each piece from generate_stream(prompt) to on_text
+        as it arrives. The complete text is stored once the stream finishes.
+        If the `cancelled` Event is set while streaming, the stream is closed and None is
+        returned without caching the partial text.
+        """
+        key = feedback_cache_key(goal, summary)
+        feedback = self.get(connection, user_id, week_start, key)
+        if feedback is None:
+            pieces = []
+            stream = generate_stream(build_feedback_prompt(goal, summary))
+            try:
+                for piece in stream:
+                    if cancelled is not None and cancelled.is_set():
+                        return None
+                    pieces.append(piece)
+                    on_text(piece)
+            finally:
+                # Stops the model request when the loop ends early
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+            if cancelled is not None and cancelled.is_set():
+                return None
+            feedback = "".join(pieces)
+            self.put(connection, user_id, week_start, week_end, key, feedback)
+        return feedback
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": ((self.memory_hits + self.db_hits) / lookups) if lookups else 0.0,
+            }
+
+
+feedback_cache = FeedbackCache(int(os.getenv("FEEDBACK_CACHE_SIZE", "256")))
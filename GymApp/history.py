@@ -0,0 +1,164 @@
+from datetime import date, datetime
+
+# Keyset pagination over a user's workouts, newest first, ordered by (date, id).
+# Shared by the web app and the Kivy client so both page through history the same way.
+
+HISTORY_COLUMNS = "id, date, exercise, sets, reps, intensity"
+
+# Rows newer than a (date, id) key, oldest first, for topping up a list already on screen
+HISTORY_NEWER_QUERY = f"""
+    SELECT {HISTORY_COLUMNS}
+    FROM workouts
+    WHERE user_id = %s AND (date > %s OR (date = %s AND id > %s))
+    ORDER BY date ASC, id ASC
+    LIMIT %s
+"""
+
+
+def encode_cursor(workout_date, workout_id):
+    """
+    Encode the (date, id) of the last row on a page as an opaque cursor string.
+    """
+    if isinstance(workout_date, (datetime, date)):
+        workout_date = workout_date.strftime('%Y-%m-%d')
+    return f"{workout_date}_{int(workout_id)}"
+
+
+def decode_cursor(cursor_value):
+    """
+    Decode a cursor string back into a (date, id) pair. Raises ValueError if malformed.
+    """
+    workout_date, _, workout_id = cursor_value.partition('_')
+    return datetime.strptime(workout_date, '%Y-%m-%d').date(), int(workout_id)
+
+
+def history_page_query(user_id, before=None, limit=50):
+    """
+    Query and parameters for one page of history rows older than the `before` (date, id) key.
+    One extra row is requested so the caller can tell whether another page exists.
+    """
+    if before is None:
+        return f"""
+            SELECT {HISTORY_COLUMNS}
+            FROM workouts
+            WHERE user_id = %s
+            ORDER BY date DESC, id DESC
+            LIMIT %s
+        """, (user_id, limit + 1)
+    before_date, before_id = before
+    return f"""
+        SELECT {HISTORY_COLUMNS}
+        FROM workouts
+        WHERE user_id = %s AND (date < %s OR (date = %s AND id < %s))
+        ORDER BY date DESC, id DESC
+        LIMIT %s
+    """, (user_id, before_date, before_date, before_id, limit + 1)
+
+
+def execute_history_page(cursor, user_id, before=None, limit=50):
+    """
+    Run the query for one page of history rows older than the `before` (date, id) key.
+    """
+    cursor.execute(*history_page_query(user_id, before=before, limit=limit))
+
+
+def fetch_newer_rows(cursor, user_id, after, limit=200):
+    """
+    Return every row newer than the `after` (date, id) key, newest first.
+    Used to top up a list that already holds older rows. Reads `limit` rows per query.
+    """
+    after_date, after_id = after
+    newer = []
+    while True:
+        cursor.execute(HISTORY_NEWER_QUERY, (user_id, after_date, after_date, after_id, limit))
+        rows = cursor.fetchall()
+        newer.extend(rows)
+        if len(rows) < limit:
+            break
+        after_date, after_id = rows[-1]['date'], rows[-1]['id']
+    newer.reverse()
+    return newer
+
+
+class LoadedHistoryPage:
+    """
+    A page of workout history fetched in full, for drivers without unbuffered cursors
+    (the async app). Takes the limit + 1 rows from history_page_query.
+    """
+
+    def __init__(self, rows, limit=50):
+        self.limit = limit
+        self.has_more = len(rows) > limit
+        self.rows = list(rows[:limit])
+        self.count = len(self.rows)
+        self.last_row = self.rows[-1] if self.rows else None
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def is_empty(self):
+        return not self.rows
+
+    @property
+    def next_cursor(self):
+        if not self.has_more or self.last_row is None:
+            return None
+        return encode_cursor(self.last_row['date'], self.last_row['id'])
+
+
+class HistoryPage:
+    """
+    One page of workout history read lazily off an unbuffered cursor.
+
+    Iterating yields rows as they come off the cursor, so a template can stream them.
+    After iteration, next_cursor holds the key for the following page (or None).
+    """
+
+    def __init__(self, cursor, user_id, before=None, limit=50):
+        self.limit = limit
+        self.count = 0
+        self.has_more = False
+        self.last_row = None
+        self._cursor = cursor
+        self._first = None
+        self._started = False
+        execute_history_page(cursor, user_id, before=before, limit=limit)
+
+    def is_empty(self):
+        """
+        Peek at the first row without consuming it.
+        """
+        if not self._started:
+            self._started = True
+            self._first = self._cursor.fetchone()
+        return self._first is None and self.count == 0
+
+    def _rows(self):
+        if not self._started:
+            self._started = True
+            self._first = self._cursor.fetchone()
+        if self._first is not None:
+            row, self._first = self._first, None
+            yield row
+        while True:
+            row = self._cursor.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __iter__(self):
+        for row in self._rows():
+            if self.count == self.limit:
+                # The extra row only tells us another page exists
+                self.has_more = True
+                self._cursor.fetchall()
+                return
+            self.count += 1
+            self.last_row = row
+            yield row
+
+    @property
+    def next_cursor(self):
+        if not self.has_more or self.last_row is None:
+            return None
+        return encode_cursor(self.last_row['date'], self.last_row['id'])
@@ -0,0 +1,303 @@
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the job queue already holds its maximum number of pending jobs."""
+
+
+_local = threading.local()
+_current_async_job = contextvars.ContextVar('current_async_job', default=None)
+
+
+def current_job():
+    """
+    The Job being run by the calling worker thread or task, or None outside a job.
+    """
+    return _current_async_job.get() or getattr(_local, 'job', None)
+
+
+class Job:
+    """
+    A unit of background work and its status.
+    state is one of 'queued', 'running', 'done' or 'failed'.
+    A running job can publish() partial output, which follow() relays as it arrives.
+    """
+
+    def __init__(self, key, owner, func, args):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.owner = owner
+        self.func = func
+        self.args = args
+        self.state = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+        self.output = []
+        self._changed = threading.Condition()
+
+    def publish(self, piece):
+        with self._changed:
+            self.output.append(piece)
+            self._changed.notify_all()
+
+    def finish(self):
+        with self._changed:
+            self.done.set()
+            self._changed.notify_all()
+
+    def follow(self, timeout=None):
+        """
+        Yield published output from the start, then each new piece as it is published,
+        until the job finishes. Stops early if nothing arrives within timeout seconds.
+        """
+        sent = 0
+        while True:
+            with self._changed:
+                if sent == len(self.output) and not self.done.is_set():
+                    if not self._changed.wait(timeout) and sent == len(self.output):
+                        return
+                pieces = self.output[sent:]
+                finished = self.done.is_set()
+            sent += len(pieces)
+            yield from pieces
+            if finished:
+                return
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    Bounded background worker pool.
+
+    workers     - number of worker threads
+    max_pending - jobs allowed to wait for a worker before submit() raises QueueFull
+    keep_for    - seconds finished jobs stay available for status polling
+
+    Jobs submitted with the same key while one is still queued or running are
+    deduplicated: the existing job is returned instead of starting another.
+    """
+
+    def __init__(self, workers=4, max_pending=100, keep_for=600):
+        self.workers = workers
+        self.keep_for = keep_for
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._active = {}  # dedup key -> job still queued or running
+        self._threads = []
+        self._started = False
+        self.deduplicated = 0
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.state = 'running'
+            _local.job = job
+            try:
+                job.result = job.func(*job.args)
+                job.state = 'done'
+            except Exception as e:
+                job.error = str(e)
+                job.state = 'failed'
+                logger.exception("Job %s failed", job.id)
+            finally:
+                _local.job = None
+                job.finished_at = time.time()
+                with self._lock:
+                    if self._active.get(job.key) is job:
+                        del self._active[job.key]
+                job.finish()
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_for
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, key, owner, func, *args):
+        """
+        Queue func(*args) unless a job with the same key is already pending.
+        Returns the Job to poll.
+        """
+        self._start()
+        with self._lock:
+            self._prune()
+            existing = self._active.get(key)
+            if existing is not None:
+                self.deduplicated += 1
+                return existing
+
+            job = Job(key, owner, func, args)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFull("Too many jobs are waiting. Please try again shortly.")
+            self._jobs[job.id] = job
+            self._active[key] = job
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._queue.qsize(),
+                "active": len(self._active),
+                "tracked": len(self._jobs),
+                "deduplicated": self.deduplicated,
+            }
+
+
+class AsyncJob(Job):
+    """
+    A Job run as a task on the event loop. follow() is an async generator.
+    """
+
+    def __init__(self, key, owner, func, args):
+        super().__init__(key, owner, func, args)
+        self.done = asyncio.Event()
+        self.task = None
+        self._updated = asyncio.Event()
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    def publish(self, piece):
+        self.output.append(piece)
+        self._notify()
+
+    def finish(self):
+        self.done.set()
+        self._notify()
+
+    async def follow(self, timeout=None):
+        """
+        Yield published output from the start, then each new piece as it is published,
+        until the job finishes. Stops early if nothing arrives within timeout seconds.
+        """
+        sent = 0
+        while True:
+            if sent < len(self.output):
+                pieces = self.output[sent:]
+                sent += len(pieces)
+                for piece in pieces:
+                    yield piece
+                continue
+            if self.done.is_set():
+                return
+            try:
+                await asyncio.wait_for(self._updated.wait(), timeout)
+            except asyncio.TimeoutError:
+                return
+
+
+class AsyncJobQueue:
+    """
+    Background coroutines for the async app, with the same submit/get/stats surface as JobQueue.
+
+    concurrency - jobs allowed to run at once; the rest wait on a semaphore
+    max_pending - jobs allowed to wait before submit() raises QueueFull
+    keep_for    - seconds finished jobs stay available for status polling
+
+    Must be used from the event loop thread.
+    """
+
+    def __init__(self, concurrency=100, max_pending=1000, keep_for=600):
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.keep_for = keep_for
+        self._semaphore = None
+        self._jobs = {}
+        self._active = {}
+        self._running = 0
+        self.deduplicated = 0
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_for
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, key, owner, func, *args):
+        """
+        Start the coroutine function func(*args) unless a job with the same key is still pending.
+        Returns the AsyncJob to poll or follow.
+        """
+        self._prune()
+        existing = self._active.get(key)
+        if existing is not None:
+            self.deduplicated += 1
+            return existing
+        if len(self._active) - self._running >= self.max_pending:
+            raise QueueFull("Too many jobs are waiting. Please try again shortly.")
+
+        job = AsyncJob(key, owner, func, args)
+        self._jobs[job.id] = job
+        self._active[key] = job
+        # A fresh context keeps the job's timings out of the request that started it
+        job.task = asyncio.get_running_loop().create_task(self._run(job), context=contextvars.Context())
+        return job
+
+    async def _run(self, job):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            self._running += 1
+            job.state = 'running'
+            _current_async_job.set(job)
+            try:
+                job.result = await job.func(*job.args)
+                job.state = 'done'
+            except Exception as e:
+                job.error = str(e)
+                job.state = 'failed'
+                logger.exception("Job %s failed", job.id)
+            finally:
+                self._running -= 1
+                job.finished_at = time.time()
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+                job.finish()
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def stats(self):
+        return {
+            "workers": self.concurrency,
+            "pending": len(self._active) - self._running,
+            "active": self._running,
+            "tracked": len(self._jobs),
+            "deduplicated": self.deduplicated,
+        }
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import time
+
+import openai
+from dotenv import load_dotenv
+
+import metrics
+from singleflight import SingleFlight
+
+load_dotenv()
+openai.api_key = os.getenv("OPENAI_API_KEY")
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+SYSTEM_PROMPT = "You are a fitness coach providing constructive feedback."
+
+# Identical prompts requested at the same time (double clicks, web and Kivy together)
+# share one OpenAI call
+llm_flights = SingleFlight()
+
+
+def prompt_key(prompt, mode):
+    payload = json.dumps([mode, LLM_MODEL, SYSTEM_PROMPT, prompt], separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _create_completion(prompt):
+    with metrics.timed("llm"):
+        return openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+
+def get_llm_response(prompt):
+    """
+    Get a response from the OpenAI GPT model.
+    Concurrent calls with the same prompt wait on a single request and share its response.
+    """
+    return llm_flights.do(prompt_key(prompt, "complete"), lambda: _create_completion(prompt))
+
+
+def llm_feedback_text(prompt):
+    """
+    Get the feedback text for a prompt from the OpenAI GPT model.
+    """
+    return get_llm_response(prompt)['choices'][0]['message']['content']
+
+
+def stream_llm_feedback(prompt):
+    """
+    Yield the feedback text for a prompt from the OpenAI GPT model as it is generated.
+    Concurrent streams of the same prompt share a single request.
+    """
+    return llm_flights.stream(prompt_key(prompt, "stream"), lambda: _stream_completion(prompt))
+
+
+def _stream_completion(prompt):
+    start = time.perf_counter()
+    first_token = True
+    response = None
+    try:
+        response = openai.ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        for chunk in response:
+            piece = chunk['choices'][0].get('delta', {}).get('content')
+            if not piece:
+                continue
+            if first_token:
+                metrics.observe("llm_first_token", time.perf_counter() - start)
+                first_token = False
+            yield piece
+    finally:
+        # Closing the response stream drops the HTTP connection if the reader stopped early
+        if response is not None and hasattr(response, "close"):
+            response.close()
+        metrics.observe("llm", time.perf_counter() - start)
+
+
+async def astream_llm_feedback(prompt):
+    """
+    Async counterpart of stream_llm_feedback for the async app, using the client's acreate().
+    Identical concurrent requests are already merged by the async app's job queue.
+    """
+    start = time.perf_counter()
+    first_token = True
+    try:
+        response = await openai.ChatCompletion.acreate(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            stream=True
+        )
+        async for chunk in response:
+            piece = chunk['choices'][0].get('delta', {}).get('content')
+            if not piece:
+                continue
+            if first_token:
+                metrics.observe("llm_first_token", time.perf_counter() - start)
+                first_token = False
+            yield piece
+    finally:
+        metrics.observe("llm", time.perf_counter() - start)
@@ -1,8 +1,12 @@
-import mysql.connector
+import time
+
+# Startup timing report: everything below is measured from here
+STARTUP_BEGAN = time.perf_counter()
+
 from datetime import datetime, timedelta
 
-from docutils.nodes import entry
 from kivy.app import App
+from kivy.clock import Clock
 from kivy.uix.label import Label
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.boxlayout import BoxLayout
@@ -10,41 +14,62 @@ from kivy.uix.button import Button
 from kivy.uix.textinput import TextInput
 from kivy.core.window import Window
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.image import Image
 from kivy.uix.floatlayout import FloatLayout
 from kivy.graphics import Color, Rectangle
+from kivy.metrics import dp
+from kivy.logger import Logger
 from dotenv import load_dotenv
-import openai
 import os
-import bcrypt
 import re
+import threading
+
+from backgrounds import backgrounds
+from history import HistoryPage, fetch_newer_rows
+from workout_journal import JournalSync, WorkoutJournal
+from workouts import validate_workout_entry
+
+# mysql.connector, bcrypt, openai and the modules built on them are imported by the
+# methods that need them, so none of them are loaded before the start menu is shown.
 
 load_dotenv()
-#Set OpenAI API KEY
-openai.api_key=os.getenv("OPENAI_API_KEY")
 
 def get_db_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",
-        database="gym_tracker"
-    )
-
-def get_llm_response(prompt):
     """
-    Interact with OPENAI API to generate feedback.
+    Check a connection out of the shared pool. Closing it returns it to the pool.
     """
+    from db import get_pool
+    return get_pool().connect()
+
+
+class LazyScreenManager(ScreenManager):
+    """
+    ScreenManager that builds each registered screen the first time it is shown,
+    so startup only pays for the start menu.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.registry = {}
+        self.build_times = {}
+
+    def register(self, name, screen_class):
+        self.registry[name] = screen_class
 
-    response = openai.ChatCompletion.create(
-        model = "gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": "You are a fitness coach providing constructive feedback"},
-            {"role": "user", "content": prompt}
-        ]
-    )
+    def is_built(self, name):
+        return name in self.screen_names
 
-    return response
+    def has_screen(self, name):
+        return name in self.registry or super().has_screen(name)
+
+    def get_screen(self, name):
+        if name in self.registry and not self.is_built(name):
+            start = time.perf_counter()
+            self.add_widget(self.registry[name](name=name))
+            self.build_times[name] = time.perf_counter() - start
+            Logger.info(f"Startup: built screen '{name}' in {self.build_times[name] * 1000:.0f} ms")
+        return super().get_screen(name)
 
 class StartMenuScreen(Screen):
     """Start Menu Screen with Register and Login options."""
@@ -54,7 +79,8 @@ class StartMenuScreen(Screen):
         layout = FloatLayout()
 
         #Add background image
-        background = Image(source='static/images/home.JPG', allow_stretch=True, keep_ratio=False)
+        background = Image(allow_stretch=True, keep_ratio=False)
+        backgrounds.load(background, 'home')
         layout.add_widget(background)
 
         #Forground Content
@@ -87,7 +113,8 @@ class RegisterScreen(Screen):
         layout = FloatLayout()
 
         #Add Backround image
-        background = Image(source='static/images/register.jpg', allow_stretch=True, keep_ratio=False)
+        background = Image(allow_stretch=True, keep_ratio=False)
+        backgrounds.load(background, 'register')
         layout.add_widget(background)
 
         menu_layout=BoxLayout(orientation='vertical', spacing=10, padding=[20,50,20,50])
@@ -137,6 +164,9 @@ class RegisterScreen(Screen):
 
     def register_user(self, instance):
         """Register a new user"""
+        import bcrypt
+        import mysql.connector
+
         name=self.name_input.text.strip()
         email=self.email_input.text.strip()
         password=self.password_input.text.strip()
@@ -223,7 +253,8 @@ class LoginScreen(Screen):
         layout = FloatLayout()
 
         #Add background image
-        background = Image(source='static/images/login.JPG', allow_stretch=True, keep_ratio=False)
+        background = Image(allow_stretch=True, keep_ratio=False)
+        backgrounds.load(background, 'login')
 
         layout.add_widget(background)
 
@@ -256,6 +287,10 @@ class LoginScreen(Screen):
         self.add_widget(layout)
     def login_user(self, instance):
         """Verify user credentials and log in"""
+        import bcrypt
+        import mysql.connector
+        from profiles import LOGIN_QUERY
+
         email=self.email_input.text.strip()
         password=self.password_input.text.strip()
 
@@ -267,7 +302,7 @@ class LoginScreen(Screen):
             cursor=conn.cursor(dictionary=True)
 
             #Check if email exists
-            cursor.execute("SELECT * FROM users WHERE email=%s", (email,))
+            cursor.execute(LOGIN_QUERY, (email,))
             user = cursor.fetchone()
 
             if not user:
@@ -297,7 +332,9 @@ class MainMenuScreen(Screen):
 
         layout = FloatLayout()
 
-        background = Image(source='static/images/main_menu.JPG', allow_stretch=True, keep_ratio=False)
+        background = Image(allow_stretch=True, keep_ratio=False)
+
+        backgrounds.load(background, 'main_menu')
         layout.add_widget(background)
 
         menu_layout = BoxLayout(orientation='vertical', spacing=10, padding=[20, 50, 20, 50])  # Padding: [left, top, right, bottom]
@@ -337,7 +374,9 @@ class LogWorkoutScreen(Screen):
 
         layout = FloatLayout()
 
-        background = Image(source='static/images/log_workout.JPG', allow_stretch=True, keep_ratio=False)
+        background = Image(allow_stretch=True, keep_ratio=False)
+
+        backgrounds.load(background, 'log_workout')
         layout.add_widget(background)
 
         menu_layout = BoxLayout(orientation='vertical', spacing=10, padding=[20, 50, 20, 50])
@@ -370,6 +409,10 @@ class LogWorkoutScreen(Screen):
         self.feedback_label=Label(text="",size_hint=(1, 0.2), color=(1, 0.84, 0, 1))
         menu_layout.add_widget(self.feedback_label)
 
+        #Pending Sync Label
+        self.pending_label=Label(text="", size_hint=(1, 0.1), color=(1, 0.84, 0, 1))
+        menu_layout.add_widget(self.pending_label)
+
         # Back to main menu button
         back_button = Button(text="Return to Main Menu", size_hint=(1, 0.2), background_color=(0, 0, 0, 1), color=(1, 0.84, 0, 1))
         back_button.bind(on_press=self.navigate_to_main_menu)
@@ -379,47 +422,39 @@ class LogWorkoutScreen(Screen):
 
         self.add_widget(layout)
 
+    def on_enter(self):
+        """Show how many workouts are still waiting to sync."""
+        self.update_pending_count()
+
     def submit_workout(self, user_id):
         """
-        Collect User Input and simulate saving the workout.
-        Provide feedback based on user input.
+        Collect User Input and journal the workout on the device.
+        The sync thread sends it to the database, so this works offline.
         """
-        exercise = self.exercise_input.text.strip()
-        sets = self.sets_input.text.strip()
-        reps = self.reps_input.text.strip()
-        intensity = self.intensity_input.text.strip()
-        workout_date=datetime.now().strftime('%Y-%m-%d')
-
-        if exercise and sets.isdigit() and reps.isdigit() and intensity:
-            try:
-                #Save to database
-                connection=get_db_connection()
-                cursor=connection.cursor()
-                cursor.execute(
-                    """
-                    INSERT INTO workouts (user_id, date, exercise, sets, reps, intensity)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (user_id, workout_date, exercise, sets, reps, intensity)
-                )
-                connection.commit()
-                self.feedback_label.text="Workout logged successfully!"
-
-                # Simulate successful workout logging
-                self.feedback_label.text = f"Workout Logged: {exercise}, {sets} sets, {reps} reps, Intensity: {intensity}"
-                self.clear_inputs()
-
-            except mysql.connector.Error as err:
-                self.feedback_label.text=f"Error: {err}"
-
-            finally:
-                if cursor:
-                    cursor.close()
-                if connection:
-                    connection.close()
-            self.clear_inputs()
-        else:
+        row, errors = validate_workout_entry({
+            'exercise': self.exercise_input.text.strip(),
+            'sets': self.sets_input.text.strip(),
+            'reps': self.reps_input.text.strip(),
+            'intensity': self.intensity_input.text.strip(),
+        })
+
+        if errors:
             self.feedback_label.text="Please fill out all fields correctly!"
+            return
+
+        app = App.get_running_app()
+        app.journal.add(user_id, row)
+        app.journal_sync.wake()
+
+        workout_date, exercise, sets, reps, intensity = row
+        self.feedback_label.text = f"Workout Logged: {exercise}, {sets} sets, {reps} reps, Intensity: {intensity}"
+        self.clear_inputs()
+        self.update_pending_count()
+
+    def update_pending_count(self, *args):
+        """Refresh the pending-sync label from the journal."""
+        pending = App.get_running_app().journal.pending_count()
+        self.pending_label.text = f"Pending sync: {pending}" if pending else "All workouts synced"
 
     def clear_inputs(self):
         """
@@ -437,6 +472,8 @@ class LogWorkoutScreen(Screen):
         self.manager.current = 'main_menu'
 
 class ProgressScreen(Screen):
+    STREAM_REFRESH = 0.1
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -444,7 +481,8 @@ class ProgressScreen(Screen):
         layout = FloatLayout()
 
         # Add background image
-        background = Image(source='static/images/view_progress.JPG', allow_stretch=True, keep_ratio=False)
+        background = Image(allow_stretch=True, keep_ratio=False)
+        backgrounds.load(background, 'view_progress')
         layout.add_widget(background)
 
         # Semi-transparent background for the content area
@@ -490,6 +528,11 @@ class ProgressScreen(Screen):
         layout.add_widget(content_background)
         self.add_widget(layout)
 
+        # In-flight feedback request and loading animation
+        self._cancel_event = None
+        self._loading_event = None
+        self._loading_dots = 0
+
     def _update_label_height(self, instance, value):
         """Dynamically adjust label height to fit content."""
         instance.height = instance.texture_size[1]
@@ -505,7 +548,49 @@ class ProgressScreen(Screen):
 
         self.fetch_feedback(user_id, user_goal)
 
+    def on_leave(self):
+        """Cancel a feedback request that is still in flight."""
+        self._cancel_fetch()
+
     def fetch_feedback(self, user_id, user_goal):
+        """Load feedback on a worker thread so the UI keeps rendering while it waits."""
+        self._cancel_fetch()
+        cancelled = threading.Event()
+        self._cancel_event = cancelled
+        self._start_loading()
+        threading.Thread(target=self._load_feedback, args=(user_id, user_goal, cancelled), daemon=True).start()
+
+    def _cancel_fetch(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+        self._stop_loading()
+
+    def _start_loading(self):
+        """Show an animated loading message until the feedback arrives."""
+        self._loading_dots = 0
+        self.feedback_label.text = "Loading feedback"
+        self._loading_event = Clock.schedule_interval(self._animate_loading, 0.4)
+
+    def _animate_loading(self, dt):
+        self._loading_dots = (self._loading_dots + 1) % 4
+        self.feedback_label.text = "Loading feedback" + "." * self._loading_dots
+
+    def _stop_loading(self):
+        if self._loading_event is not None:
+            self._loading_event.cancel()
+            self._loading_event = None
+
+    def _load_feedback(self, user_id, user_goal, cancelled):
+        """Runs on a worker thread: read the week's rollup and get feedback without touching widgets."""
+        import mysql.connector
+
+        from feedback import feedback_cache
+        from llm import stream_llm_feedback
+        from rollups import fetch_week_rollup
+
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor(dictionary=True)
@@ -514,43 +599,63 @@ class ProgressScreen(Screen):
             start_of_week = today - timedelta(days=today.weekday())
             end_of_week = start_of_week + timedelta(days=6)
 
-            cursor.execute(
-                """
-                SELECT * FROM workouts WHERE user_id = %s AND date BETWEEN %s and %s
-                """,
-                (user_id, start_of_week.strftime('%Y-%m-%d'), end_of_week.strftime('%Y-%m-%d'))
-            )
-            workouts = cursor.fetchall()
+            # Per-exercise rollup for the current week
+            summary = fetch_week_rollup(cursor, user_id, start_of_week.strftime('%Y-%m-%d'))
 
-            if not workouts:
-                self.feedback_label.text = "No workouts logged this week!"
+            if not summary:
+                text = "No workouts logged this week!"
+            elif cancelled.is_set():
+                # The user left the screen before the slow part started
                 return
-
-            # Generate feedback using OpenAI
-            workouts_summary = "\n".join(
-                f"Exercise: {w['exercise']}, Sets: {w['sets']}, Reps: {w['reps']}, Intensity: {w['intensity']}"
-                for w in workouts
-            )
-            prompt = (
-                f"Based on the following workout log, provide constructive feedback for the user:\n\n"
-                f"Goals: {user_goal}\n\n"
-                f"Weekly Workout Log:\n{workouts_summary}\n\n"
-                f"Focus on encouragement, areas of improvements, and suggestions for next week."
-            )
-
-            response = get_llm_response(prompt)
-            feedback = response['choices'][0]['message']['content']
-            self.feedback_label.text = feedback
+            else:
+                # Stream feedback from OpenAI into the label, reusing cached feedback when the inputs are unchanged.
+                # The label is refreshed at most every STREAM_REFRESH seconds so long answers don't relayout per token.
+                pieces = []
+                last_refresh = [0.0]
+
+                def on_text(piece):
+                    pieces.append(piece)
+                    now = time.monotonic()
+                    if now - last_refresh[0] >= self.STREAM_REFRESH and not cancelled.is_set():
+                        last_refresh[0] = now
+                        partial = "".join(pieces)
+                        Clock.schedule_once(lambda dt: self._append_feedback(partial, cancelled))
+
+                text = feedback_cache.get_or_stream(
+                    connection, user_id, user_goal, summary,
+                    start_of_week.strftime('%Y-%m-%d'), end_of_week.strftime('%Y-%m-%d'),
+                    generate_stream=stream_llm_feedback, on_text=on_text, cancelled=cancelled
+                )
+                if text is None:
+                    # The user left the screen; the stream was closed and nothing was cached
+                    return
         except mysql.connector.Error as err:
-            self.feedback_label.text = f"Database Error: {err}"
+            text = f"Database Error: {err}"
         except Exception as e:
-            self.feedback_label.text = f"Unexpected Error: {e}"
+            text = f"Unexpected Error: {e}"
         finally:
             if cursor:
                 cursor.close()
             if connection:
                 connection.close()
 
+        Clock.schedule_once(lambda dt: self._show_feedback(text, cancelled))
+
+    def _append_feedback(self, partial, cancelled):
+        """Runs on the UI thread while feedback is streaming in."""
+        if cancelled.is_set():
+            return
+        self._stop_loading()
+        self.feedback_label.text = partial
+
+    def _show_feedback(self, text, cancelled):
+        """Runs on the UI thread once the worker finishes."""
+        if cancelled.is_set():
+            return
+        self._cancel_event = None
+        self._stop_loading()
+        self.feedback_label.text = text
+
     def navigate_to_main_menu(self, instance):
         """Navigate back to Main Menu."""
         self.manager.current = 'main_menu'
@@ -597,6 +702,7 @@ class UpdateGoalScreen(Screen):
         """
         Update the user's fitness goal in the database
         """
+        import mysql.connector
 
         new_goal=self.goal_input.text.strip()
 
@@ -635,7 +741,23 @@ class UpdateGoalScreen(Screen):
 
         self.manager.current='main_menu'
 
+class HistoryRow(Label):
+    """One workout in the history list. Instances are recycled as the list scrolls."""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.color = (1, 0.84, 0, 1)
+        self.font_size = '16sp'
+        self.halign = "left"
+        self.valign = "top"
+        self.bind(size=lambda instance, value: setattr(instance, 'text_size', value))
+
 class HistoryScreen(Screen):
+    """
+    Workout history rendered through a RecycleView, so only visible rows get widgets.
+    Older pages load as the list nears the bottom; re-entering only fetches newer rows.
+    """
+    PAGE_SIZE = 50
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         layout=BoxLayout(orientation='vertical', spacing=10, padding=[20,50,20,50])
@@ -643,21 +765,18 @@ class HistoryScreen(Screen):
         #Title Label
         layout.add_widget(Label(text="Workout History", size_hint=(1, 0.2), color=(1, 0.84, 0, 1)))
 
-        #Scrollable workout history display
-        self.scroll_view=ScrollView(size_hint=(1, 0.7))
-        self.history_label=Label(
-            text="",
-            size_hint=(1, None),
-            color=(1, 0.84, 0, 1),
-            font_size='16sp',
-            text_size=(Window.width*0.9, None),
-            halign="left",
-            valign="top",
-        )
+        #Status Label for empty history, errors and loading
+        self.status_label=Label(text="", size_hint=(1, 0.1), color=(1, 0.84, 0, 1))
+        layout.add_widget(self.status_label)
 
-        self.history_label.bind(texture_size=self._update_label_height)
-        self.scroll_view.add_widget(self.history_label)
-        layout.add_widget(self.scroll_view)
+        #Virtualized workout history list
+        self.history_list=RecycleView(size_hint=(1, 0.6))
+        self.history_list.viewclass=HistoryRow
+        rows_layout=RecycleBoxLayout(orientation='vertical', size_hint_y=None, default_size=(None, dp(110)), default_size_hint=(1, None))
+        rows_layout.bind(minimum_height=rows_layout.setter('height'))
+        self.history_list.add_widget(rows_layout)
+        self.history_list.bind(scroll_y=self._on_scroll)
+        layout.add_widget(self.history_list)
 
         #Back Button
         back_button=Button(text="Return to Main Menu", size_hint=(0.8, 0.2), pos_hint={'center_x':0.5}, background_color=(1, 0.84, 0, 1),color=(0, 0, 0, 1))
@@ -666,52 +785,98 @@ class HistoryScreen(Screen):
 
         self.add_widget(layout)
 
-    def _update_label_height(self, instance, value):
-        """Update height of the label based on its content"""
-        instance.height = instance.texture_size[1]
+        #Loaded rows, newest first, and paging state
+        self.rows=[]
+        self.loaded_user_id=None
+        self.has_more=False
+        self.loading=False
 
     def on_enter(self):
         user_id=self.manager.user_id
-        self.fetch_workout_history(user_id)
+        if user_id != self.loaded_user_id or not self.rows:
+            self.rows=[]
+            self.history_list.data=[]
+            self.loaded_user_id=user_id
+            self._load(self._fetch_first_page, user_id)
+        else:
+            self._load(self._fetch_newer, user_id, self._row_key(self.rows[0]))
 
-    def fetch_workout_history(self, user_id):
-        try:
-            connection=get_db_connection()
-            cursor=connection.cursor(dictionary=True)
+    def _on_scroll(self, instance, scroll_y):
+        """Load the next page once the list is scrolled near the bottom."""
+        if scroll_y <= 0.05 and self.has_more and not self.loading and self.rows:
+            self._load(self._fetch_older, self.loaded_user_id, self._row_key(self.rows[-1]))
 
-            #Check if the user has any workout history
-            cursor.execute("SELECT COUNT(*) as count FROM workouts WHERE user_id = %s", (user_id,))
-            result=cursor.fetchone()
+    @staticmethod
+    def _row_key(row):
+        return (row['date'], row['id'])
 
-            if result['count']==0:
-                self.history_label.text="No workout history available. Please log a workout first."
-                return
+    @staticmethod
+    def _format_row(entry):
+        return {'text': f"Date: {entry['date']}\nExercise: {entry['exercise']}\nSets: {entry['sets']}\nReps: {entry['reps']}\nIntensity: {entry['intensity']}"}
 
-            #Fetch Workout History
-            cursor.execute("""
-            SELECT date, exercise, sets, reps, intensity
-            FROM workouts
-            WHERE user_id=%s
-            ORDER BY date DESC
-            """, (user_id,))
-            workout_history=cursor.fetchall()
-
-            #Format the workout history for display
-            history_text="\n\n".join(
-                f"Date: {entry['date']}\nExercise: {entry['exercise']}\nSets: {entry['sets']}\nReps: {entry['reps']}\nIntensity: {entry['intensity']}"
-                for entry in workout_history
-            )
+    def _load(self, fetch, *args):
+        """Run a fetch on a worker thread and apply its result on the UI thread."""
+        self.loading=True
+        threading.Thread(target=self._run_fetch, args=(fetch,) + args, daemon=True).start()
 
-            self.history_label.text=history_text
+    def _run_fetch(self, fetch, user_id, *args):
+        import mysql.connector
 
+        connection=None
+        cursor=None
+        try:
+            connection=get_db_connection()
+            cursor=connection.cursor(dictionary=True)
+            result=fetch(cursor, user_id, *args)
+            error=None
         except mysql.connector.Error as err:
-            self.history_label.text=f"Error: {err}"
-
+            result=None
+            error=f"Error: {err}"
         finally:
             if cursor:
                 cursor.close()
             if connection:
                 connection.close()
+        Clock.schedule_once(lambda dt: self._apply(user_id, result, error))
+
+    def _fetch_first_page(self, cursor, user_id):
+        page=HistoryPage(cursor, user_id, limit=self.PAGE_SIZE)
+        return 'replace', list(page), page.has_more
+
+    def _fetch_older(self, cursor, user_id, before):
+        page=HistoryPage(cursor, user_id, before=before, limit=self.PAGE_SIZE)
+        return 'append', list(page), page.has_more
+
+    def _fetch_newer(self, cursor, user_id, after):
+        return 'prepend', fetch_newer_rows(cursor, user_id, after), None
+
+    def _apply(self, user_id, result, error):
+        """Merge a fetched page into the list. Runs on the UI thread."""
+        self.loading=False
+        if user_id != self.loaded_user_id:
+            return
+        if error:
+            self.status_label.text=error
+            return
+
+        mode, rows, has_more=result
+        new_data=[self._format_row(entry) for entry in rows]
+        if mode == 'replace':
+            self.rows=rows
+            self.history_list.data=new_data
+        elif mode == 'append':
+            self.rows.extend(rows)
+            self.history_list.data.extend(new_data)
+        elif rows:
+            self.rows=rows + self.rows
+            self.history_list.data=new_data + list(self.history_list.data)
+        if has_more is not None:
+            self.has_more=has_more
+
+        if not self.rows:
+            self.status_label.text="No workout history available. Please log a workout first."
+        else:
+            self.status_label.text=""
 
     def navigate_to_main_menu(self, instance):
         """Navigate back to Main Menu"""
@@ -720,21 +885,56 @@ class HistoryScreen(Screen):
 # Main App
 class GymApp(App):
     def build(self):
-        sm = ScreenManager()
+        # Offline journal for logged workouts, drained to MySQL in the background
+        self.journal = WorkoutJournal(os.path.join(self.user_data_dir, 'workout_journal.db'))
+        self.journal_sync = JournalSync(self.journal, on_change=self._on_journal_synced)
+
+        self.build_began = time.perf_counter()
+        sm = LazyScreenManager()
         sm.user_id = None
         sm.user_goal = None
 
-        # Add Screens to the Screen Manager
-        sm.add_widget(StartMenuScreen(name='start_menu'))
-        sm.add_widget(RegisterScreen(name='register'))
-        sm.add_widget(LoginScreen(name='login'))
-        sm.add_widget(MainMenuScreen(name='main_menu'))
-        sm.add_widget(LogWorkoutScreen(name='log_workout'))
-        sm.add_widget(ProgressScreen(name='progress'))
-        sm.add_widget(UpdateGoalScreen(name='update_goal'))
-        sm.add_widget(HistoryScreen(name='history'))
-
+        # Register Screens with the Screen Manager; each is built on first navigation
+        sm.register('start_menu', StartMenuScreen)
+        sm.register('register', RegisterScreen)
+        sm.register('login', LoginScreen)
+        sm.register('main_menu', MainMenuScreen)
+        sm.register('log_workout', LogWorkoutScreen)
+        sm.register('progress', ProgressScreen)
+        sm.register('update_goal', UpdateGoalScreen)
+        sm.register('history', HistoryScreen)
+        sm.current = 'start_menu'
+
+        self.build_ended = time.perf_counter()
         return sm
 
+    def on_start(self):
+        # Report once the first frame is drawn, then start syncing so it doesn't compete with it
+        Clock.schedule_once(self._first_frame)
+
+    def _first_frame(self, dt):
+        now = time.perf_counter()
+        Logger.info(
+            f"Startup: imports {(self.build_began - STARTUP_BEGAN) * 1000:.0f} ms, "
+            f"build {(self.build_ended - self.build_began) * 1000:.0f} ms "
+            f"(start menu {self.root.build_times.get('start_menu', 0) * 1000:.0f} ms), "
+            f"first frame {(now - self.build_ended) * 1000:.0f} ms, "
+            f"total {(now - STARTUP_BEGAN) * 1000:.0f} ms"
+        )
+        self.journal_sync.start()
+
+    def on_stop(self):
+        self.journal_sync.stop()
+        self.journal.close()
+
+    def _on_journal_synced(self, pending):
+        """Called from the sync thread; refresh the pending count on the UI thread."""
+        Clock.schedule_once(self._refresh_pending_count)
+
+    def _refresh_pending_count(self, dt):
+        # An unbuilt log screen reads the count when it is first entered
+        if self.root.is_built('log_workout'):
+            self.root.get_screen('log_workout').update_pending_count()
+
 if __name__ == '__main__':
     GymApp().run()
\ No newline at end of file
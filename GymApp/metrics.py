@@ -0,0 +1,172 @@
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Request timing instrumentation.
+#
+# Hooks call observe() / timed() with a component name (db_connect, db_query, llm,
+# llm_first_token, password_hash, password_verify, template_render). Each observation goes into a
+# histogram labelled by component and by the route of the current request, and is
+# added to the request's own totals, which app.py returns as a Server-Timing header.
+# Work done outside a request (background jobs, batch scripts) is labelled "background".
+# render_prometheus() produces the text served at /metrics.
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+
+# Seconds; spans pool checkouts and index lookups up to slow completions
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Prometheus-style histogram keyed by a tuple of label values.
+    Counts are kept per bucket and made cumulative only when rendered.
+    """
+
+    def __init__(self, name, help_text, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(snapshot.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RequestTimings:
+    """
+    Per-component totals for one request.
+    """
+
+    __slots__ = ("route", "started", "totals", "counts")
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.totals = {}
+        self.counts = {}
+
+    def add(self, component, seconds):
+        self.totals[component] = self.totals.get(component, 0.0) + seconds
+        self.counts[component] = self.counts.get(component, 0) + 1
+
+    def server_timing(self):
+        """
+        Server-Timing header value, durations in milliseconds.
+        """
+        parts = [
+            f'{component};dur={seconds * 1000:.1f};desc="{self.counts[component]} calls"'
+            for component, seconds in self.totals.items()
+        ]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+component_seconds = Histogram(
+    "gymapp_component_seconds",
+    "Time spent in database, LLM, bcrypt and template calls.",
+    ("component", "route"),
+)
+request_seconds = Histogram(
+    "gymapp_request_seconds",
+    "Time to produce a response, by route, method and status.",
+    ("route", "method", "status"),
+)
+
+
+def start_request(route):
+    """
+    Begin collecting timings for a request. Returns a token for finish_request().
+    """
+    if not METRICS_ENABLED:
+        return None
+    return _current.set(RequestTimings(route))
+
+
+def current_request():
+    return _current.get()
+
+
+def finish_request(token, method, status):
+    """
+    Record the request's duration and stop collecting for it.
+    """
+    if token is None:
+        return
+    timings = _current.get()
+    if timings is not None:
+        request_seconds.observe(time.perf_counter() - timings.started, (timings.route, method, str(status)))
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Token set in a different context (e.g. a streamed response); nothing left to undo
+        pass
+
+
+def observe(component, seconds):
+    """
+    Record time spent in a component against the current request's route.
+    """
+    if not METRICS_ENABLED:
+        return
+    timings = _current.get()
+    if timings is None:
+        component_seconds.observe(seconds, (component, "background"))
+        return
+    timings.add(component, seconds)
+    component_seconds.observe(seconds, (component, timings.route))
+
+
+@contextmanager
+def timed(component):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(component, time.perf_counter() - start)
+
+
+def render_prometheus(gauges=()):
+    """
+    Render every histogram, plus (name, help, value) gauges, in the Prometheus text format.
+    """
+    lines = component_seconds.render() + request_seconds.render()
+    for name, help_text, value in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+import metrics
+
+# bcrypt work factor for new hashes. Stored hashes below it are upgraded on login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Processes used for hashing. 0 hashes inline on the calling thread.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+
+def validate_password(password):
+    """
+        Validates a password to ensure it contains:
+        - At least one uppercase letter
+        - At least one lowercase letter
+        - At least one special character
+        - At least one number
+        - Minimum length of 8 characters
+        """
+
+    if (len(password)>=8 and
+        re.search(r"[A-Z]", password) and
+        re.search(r"[a-z]", password) and
+        re.search(r"[0-9]", password) and
+        re.search(r"[!@#$%^&*(),.?\":{}|<>]", password)):
+        return True
+    return False
+
+
+def _hashpw(password, rounds):
+    start = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+    return hashed, time.perf_counter() - start
+
+
+def _checkpw(password, hashed):
+    start = time.perf_counter()
+    matches = bcrypt.checkpw(password, hashed)
+    return matches, time.perf_counter() - start
+
+
+class HashTimings:
+    """
+    Timing samples for one kind of bcrypt operation.
+    total_ms includes time spent queued for a worker; compute_ms is bcrypt alone.
+    """
+
+    def __init__(self, maxlen=1000):
+        self.count = 0
+        self._total = deque(maxlen=maxlen)
+        self._compute = deque(maxlen=maxlen)
+
+    def record(self, total, compute):
+        self.count += 1
+        self._total.append(total)
+        self._compute.append(compute)
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        ordered = sorted(samples)
+        return {
+            "avg": sum(ordered) / len(ordered) * 1000,
+            "p50": ordered[len(ordered) // 2] * 1000,
+            "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+            "max": ordered[-1] * 1000,
+        }
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "total_ms": self._summary(self._total),
+            "compute_ms": self._summary(self._compute),
+        }
+
+
+_executor = None
+_lock = threading.Lock()
+_timings = {"hash": HashTimings(), "verify": HashTimings()}
+_rehashed = 0
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    return _executor
+
+
+def _record(kind, total, compute):
+    with _lock:
+        _timings[kind].record(total, compute)
+    metrics.observe(f"password_{kind}", total)
+
+
+def _run(kind, func, *args):
+    start = time.perf_counter()
+    if PASSWORD_HASH_WORKERS > 0:
+        result, compute = _get_executor().submit(func, *args).result()
+    else:
+        result, compute = func(*args)
+    _record(kind, time.perf_counter() - start, compute)
+    return result
+
+
+async def _run_async(kind, func, *args):
+    start = time.perf_counter()
+    if PASSWORD_HASH_WORKERS > 0:
+        result, compute = await asyncio.wrap_future(_get_executor().submit(func, *args))
+    else:
+        result, compute = await asyncio.to_thread(func, *args)
+    _record(kind, time.perf_counter() - start, compute)
+    return result
+
+
+def hash_password(password, rounds=None):
+    """
+    Hash a password with bcrypt on the hashing process pool. Returns the hash as a string.
+    """
+    hashed = _run("hash", _hashpw, password.encode('utf-8'), rounds or BCRYPT_ROUNDS)
+    return hashed.decode('utf-8')
+
+
+def verify_password(input_password, hashed_password):
+    """
+    Check a password against a stored bcrypt hash on the hashing process pool.
+    """
+    return _run("verify", _checkpw, input_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+async def hash_password_async(password, rounds=None):
+    """
+    hash_password for the async app: awaits the hashing pool instead of blocking the event loop.
+    """
+    hashed = await _run_async("hash", _hashpw, password.encode('utf-8'), rounds or BCRYPT_ROUNDS)
+    return hashed.decode('utf-8')
+
+
+async def verify_password_async(input_password, hashed_password):
+    """
+    verify_password for the async app: awaits the hashing pool instead of blocking the event loop.
+    """
+    return await _run_async("verify", _checkpw, input_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def hash_rounds(hashed_password):
+    """
+    Read the work factor out of a bcrypt hash such as $2b$12$...
+    """
+    try:
+        return int(hashed_password.split('$')[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed_password):
+    return hash_rounds(hashed_password) < BCRYPT_ROUNDS
+
+
+def record_rehash():
+    global _rehashed
+    with _lock:
+        _rehashed += 1
+
+
+def stats():
+    """
+    Report bcrypt timings so the work factor can be tuned against login latency.
+    """
+    with _lock:
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "workers": PASSWORD_HASH_WORKERS,
+            "rehashed": _rehashed,
+            "hash": _timings["hash"].stats(),
+            "verify": _timings["verify"].stats(),
+        }
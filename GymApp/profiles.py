@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PROFILE_COLUMNS = "id, name, goal"
+PROFILE_QUERY = f"SELECT {PROFILE_COLUMNS} FROM users WHERE id = %s"
+# Login needs the hash as well; the profile part of the row warms the cache
+LOGIN_QUERY = f"SELECT {PROFILE_COLUMNS}, password FROM users WHERE email = %s"
+
+
+def profile_from_row(row):
+    return {"id": row["id"], "name": row["name"], "goal": row["goal"]}
+
+
+class ProfileCache:
+    """
+    In-process cache of the user columns the pages show (id, name, goal).
+
+    Bounded LRU whose entries expire after `ttl` seconds. Writes in this process update
+    or drop the entry straight away; the TTL bounds how long other processes can serve
+    a profile changed elsewhere. Only found users are cached.
+    """
+
+    def __init__(self, max_entries=10000, ttl=60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user_id -> (expires_at, profile)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.loads = 0
+        self.stale_loads = 0
+
+    def lookup(self, user_id):
+        """
+        Return a copy of the cached profile, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return dict(entry[1])
+
+    def snapshot(self):
+        """
+        Token to pass to put() for a profile about to be read from the database.
+        """
+        with self._lock:
+            return self._writes
+
+    def put(self, user_id, profile, snapshot=None):
+        """
+        Cache a profile. With a snapshot, the profile is dropped if any profile was
+        written since, because the read may have raced that write.
+        """
+        profile = profile_from_row(profile)
+        with self._lock:
+            if snapshot is not None and snapshot != self._writes:
+                self.stale_loads += 1
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, user_id, **fields):
+        """
+        Write through a change that has been committed to users.
+        """
+        with self._lock:
+            self._writes += 1
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries[user_id] = (time.monotonic() + self.ttl, dict(entry[1], **fields))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._writes += 1
+            self._entries.pop(user_id, None)
+
+    def fetch(self, connection, user_id):
+        """
+        Read a profile from the database and cache it. Returns None if there is no such user.
+        """
+        snapshot = self.snapshot()
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(PROFILE_QUERY, (user_id,))
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        return self.loaded(user_id, row, snapshot)
+
+    def loaded(self, user_id, row, snapshot):
+        """
+        Cache the result of PROFILE_QUERY (None if no row) run after snapshot() was taken.
+        Used directly by callers that query users through another driver.
+        """
+        with self._lock:
+            self.loads += 1
+        if row is None:
+            return None
+        profile = profile_from_row(row)
+        self.put(user_id, profile, snapshot)
+        return profile
+
+    def load(self, connection, user_id):
+        """
+        Return the user's profile from the cache, or from the database on a miss.
+        """
+        profile = self.lookup(user_id)
+        if profile is None:
+            profile = self.fetch(connection, user_id)
+        return profile
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "loads": self.loads,
+                "stale_loads": self.stale_loads,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+profile_cache = ProfileCache(
+    max_entries=int(os.getenv("PROFILE_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "60"))
+)
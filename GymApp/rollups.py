@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+# Per-user, per-week, per-exercise rollup of logged workouts.
+# Updated in the same transaction as every workout insert, so weekly summaries
+# read O(exercises) rows instead of re-scanning the week's raw workouts.
+
+INTENSITY_LEVELS = ('low', 'medium', 'high', 'other')
+
+ROLLUP_COLUMNS = (
+    "exercise, total_sets, total_reps, volume, entry_count, BIT_COUNT(day_mask) AS session_count, "
+    "intensity_low, intensity_medium, intensity_high, intensity_other"
+)
+
+UPSERT_ROLLUP = """
+    INSERT INTO workout_rollups (user_id, week_start, exercise, total_sets, total_reps, volume,
+                                 entry_count, day_mask, intensity_low, intensity_medium,
+                                 intensity_high, intensity_other)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_sets = total_sets + VALUES(total_sets),
+        total_reps = total_reps + VALUES(total_reps),
+        volume = volume + VALUES(volume),
+        entry_count = entry_count + VALUES(entry_count),
+        day_mask = day_mask | VALUES(day_mask),
+        intensity_low = intensity_low + VALUES(intensity_low),
+        intensity_medium = intensity_medium + VALUES(intensity_medium),
+        intensity_high = intensity_high + VALUES(intensity_high),
+        intensity_other = intensity_other + VALUES(intensity_other)
+"""
+
+
+WEEK_ROLLUP_QUERY = f"""
+    SELECT {ROLLUP_COLUMNS}
+    FROM workout_rollups
+    WHERE user_id = %s AND week_start = %s
+    ORDER BY exercise
+"""
+
+
+def intensity_bucket(intensity):
+    """
+    Map free-text intensity onto low / medium / high, or other.
+    """
+    value = str(intensity or '').strip().lower()
+    return value if value in INTENSITY_LEVELS else 'other'
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def week_start_for(value):
+    """
+    Monday of the week containing the given date.
+    """
+    day = _as_date(value)
+    return day - timedelta(days=day.weekday())
+
+
+def rollup_params(user_id, rows):
+    """
+    Combine (date, exercise, sets, reps, intensity) rows per (week, exercise) into
+    UPSERT_ROLLUP parameters, one set per exercise and week.
+    """
+    totals = OrderedDict()
+    for workout_date, exercise, sets, reps, intensity in rows:
+        day = _as_date(workout_date)
+        key = (week_start_for(day), exercise)
+        entry = totals.setdefault(key, [0, 0, 0, 0, 0, {level: 0 for level in INTENSITY_LEVELS}])
+        entry[0] += int(sets)
+        entry[1] += int(reps)
+        entry[2] += int(sets) * int(reps)
+        entry[3] += 1
+        entry[4] |= 1 << day.weekday()
+        entry[5][intensity_bucket(intensity)] += 1
+
+    return [
+        (user_id, week_start.strftime('%Y-%m-%d'), exercise, sets, reps, volume, entries, day_mask)
+        + tuple(intensity[level] for level in INTENSITY_LEVELS)
+        for (week_start, exercise), (sets, reps, volume, entries, day_mask, intensity) in totals.items()
+    ]
+
+
+def apply_to_rollups(cursor, user_id, rows):
+    """
+    Add newly inserted (date, exercise, sets, reps, intensity) rows to the rollup.
+    Rows are combined per (week, exercise) first, so a batch costs one upsert per exercise.
+    Must run in the same transaction as the workout insert.
+    """
+    params = rollup_params(user_id, rows)
+    if params:
+        cursor.executemany(UPSERT_ROLLUP, params)
+
+
+def fetch_week_rollup(cursor, user_id, week_start):
+    """
+    Return the week's per-exercise summary, ordered by exercise:
+    [{exercise, total_sets, total_reps, volume, entry_count, session_count, intensity: {level: count}}]
+    """
+    cursor.execute(WEEK_ROLLUP_QUERY, (user_id, week_start))
+    columns = [column[0] for column in cursor.description]
+    return summary_from_rows(cursor.fetchall(), columns)
+
+
+def summary_from_rows(rows, columns):
+    """
+    Shape WEEK_ROLLUP_QUERY rows (tuples or dicts) into the weekly summary.
+    """
+    summary = []
+    for row in rows:
+        if not isinstance(row, dict):
+            row = dict(zip(columns, row))
+        summary.append({
+            "exercise": row['exercise'],
+            "total_sets": int(row['total_sets']),
+            "total_reps": int(row['total_reps']),
+            "volume": int(row['volume']),
+            "entry_count": int(row['entry_count']),
+            "session_count": int(row['session_count']),
+            "intensity": {level: int(row[f'intensity_{level}']) for level in INTENSITY_LEVELS},
+        })
+    return summary
+
+
+def rebuild_rollups(cursor, user_id=None):
+    """
+    Recompute the rollup from the raw workouts table, for every user or just one.
+    Used to backfill when the table is created and to repair drift.
+    """
+    where = "WHERE user_id = %s" if user_id is not None else ""
+    params = (user_id,) if user_id is not None else ()
+    cursor.execute(f"DELETE FROM workout_rollups {where}", params)
+    cursor.execute(f"""
+        INSERT INTO workout_rollups (user_id, week_start, exercise, total_sets, total_reps, volume,
+                                     entry_count, day_mask, intensity_low, intensity_medium,
+                                     intensity_high, intensity_other)
+        SELECT user_id,
+               DATE_SUB(date, INTERVAL WEEKDAY(date) DAY) AS week_start,
+               exercise,
+               SUM(sets), SUM(reps), SUM(sets * reps), COUNT(*),
+               BIT_OR(1 << WEEKDAY(date)),
+               SUM(LOWER(TRIM(intensity)) = 'low'),
+               SUM(LOWER(TRIM(intensity)) = 'medium'),
+               SUM(LOWER(TRIM(intensity)) = 'high'),
+               SUM(COALESCE(LOWER(TRIM(intensity)), '') NOT IN ('low', 'medium', 'high'))
+        FROM workouts
+        {where}
+        GROUP BY user_id, week_start, exercise
+    """, params)
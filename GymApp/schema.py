@@ -0,0 +1,288 @@
+import sys
+from datetime import date, timedelta
+
+import mysql.connector
+
+from analytics import LOAD_QUERY
+from db import get_pool
+from feedback import FEEDBACK_LOOKUP_QUERY
+from history import HISTORY_NEWER_QUERY, history_page_query
+from profiles import LOGIN_QUERY, PROFILE_QUERY
+from rollups import WEEK_ROLLUP_QUERY, rebuild_rollups
+from weekly_rollover import FEEDBACK_CANDIDATES_QUERY, WEEKLY_LOGS_QUERY
+
+# Versioned schema for the gym_tracker database.
+#
+#   python schema.py migrate   - create or upgrade the tables and indexes
+#   python schema.py check     - EXPLAIN every query the apps run and fail on full table scans
+#   python schema.py version   - print the current schema version
+
+
+def create_base_tables(cursor):
+    """
+    Create the four application tables with their primary keys.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            age INT,
+            feet INT,
+            inches INT,
+            weight DECIMAL(6, 1),
+            goal VARCHAR(255),
+            password VARCHAR(255) NOT NULL
+        ) ENGINE=InnoDB
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS workouts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            date DATE NOT NULL,
+            exercise VARCHAR(100) NOT NULL,
+            sets INT NOT NULL,
+            reps INT NOT NULL,
+            intensity VARCHAR(50),
+            CONSTRAINT fk_workouts_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) ENGINE=InnoDB
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS weeklyworkouts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            week_start DATE NOT NULL,
+            week_end DATE NOT NULL,
+            workout_log LONGTEXT,
+            CONSTRAINT fk_weeklyworkouts_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) ENGINE=InnoDB
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS weeklyfeedback (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            week_start DATE NOT NULL,
+            week_end DATE NOT NULL,
+            feedback TEXT,
+            CONSTRAINT fk_weeklyfeedback_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) ENGINE=InnoDB
+    """)
+
+
+def index_exists(cursor, table, index_name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index_name))
+    return cursor.fetchone()[0] > 0
+
+
+def ensure_index(cursor, table, index_name, columns, unique=False):
+    """
+    Add an index if it is not already present, so upgrades from hand-made tables work.
+    """
+    if index_exists(cursor, table, index_name):
+        return
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    cursor.execute(f"ALTER TABLE {table} ADD {kind} {index_name} ({', '.join(columns)})")
+
+
+def add_hot_query_indexes(cursor):
+    """
+    Indexes for the login lookup, the weekly BETWEEN scans and history sorts,
+    and the unique keys the ON DUPLICATE KEY UPDATE statements rely on.
+    """
+    ensure_index(cursor, "users", "uq_users_email", ["email"], unique=True)
+    # InnoDB appends the primary key, so this also serves ORDER BY date DESC, id DESC
+    ensure_index(cursor, "workouts", "idx_workouts_user_date", ["user_id", "date"])
+    ensure_index(cursor, "weeklyworkouts", "uq_weeklyworkouts_user_week", ["user_id", "week_start"], unique=True)
+    ensure_index(cursor, "weeklyfeedback", "uq_weeklyfeedback_user_week", ["user_id", "week_start"], unique=True)
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def add_feedback_input_hash(cursor):
+    """
+    Record which inputs produced each stored feedback so it can be reused as a cache.
+    """
+    if not column_exists(cursor, "weeklyfeedback", "input_hash"):
+        cursor.execute("ALTER TABLE weeklyfeedback ADD COLUMN input_hash CHAR(64) NULL")
+
+
+def add_workout_client_key(cursor):
+    """
+    Idempotency key for workouts synced from the Kivy client's offline journal.
+    """
+    if not column_exists(cursor, "workouts", "client_key"):
+        cursor.execute("ALTER TABLE workouts ADD COLUMN client_key CHAR(32) NULL")
+    ensure_index(cursor, "workouts", "uq_workouts_client_key", ["client_key"], unique=True)
+
+
+def create_workout_rollups(cursor):
+    """
+    Per-user, per-week, per-exercise totals maintained on every workout insert.
+    day_mask has one bit per weekday trained, so sessions are BIT_COUNT(day_mask).
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS workout_rollups (
+            user_id INT NOT NULL,
+            week_start DATE NOT NULL,
+            exercise VARCHAR(100) NOT NULL,
+            total_sets INT NOT NULL DEFAULT 0,
+            total_reps INT NOT NULL DEFAULT 0,
+            volume BIGINT NOT NULL DEFAULT 0,
+            entry_count INT NOT NULL DEFAULT 0,
+            day_mask TINYINT UNSIGNED NOT NULL DEFAULT 0,
+            intensity_low INT NOT NULL DEFAULT 0,
+            intensity_medium INT NOT NULL DEFAULT 0,
+            intensity_high INT NOT NULL DEFAULT 0,
+            intensity_other INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, week_start, exercise),
+            CONSTRAINT fk_workout_rollups_user FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        ) ENGINE=InnoDB
+    """)
+    rebuild_rollups(cursor)
+
+
+def add_week_indexes(cursor):
+    """
+    Let the weekly rollover job find every user's rows for one week without a full scan.
+    """
+    ensure_index(cursor, "workout_rollups", "idx_workout_rollups_week_user", ["week_start", "user_id"])
+    ensure_index(cursor, "weeklyworkouts", "idx_weeklyworkouts_week_user", ["week_start", "user_id"])
+
+
+# (version, description, function) - append new migrations, never edit applied ones
+MIGRATIONS = [
+    (1, "create base tables", create_base_tables),
+    (2, "add hot query indexes", add_hot_query_indexes),
+    (3, "add weeklyfeedback input hash", add_feedback_input_hash),
+    (4, "add workouts client key", add_workout_client_key),
+    (5, "create weekly workout rollups", create_workout_rollups),
+    (6, "add weekly rollover indexes", add_week_indexes),
+]
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB
+    """)
+
+
+def current_version(cursor):
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def migrate(connection, target=None):
+    """
+    Apply every migration newer than the recorded schema version, in order.
+    Returns the list of versions applied.
+    """
+    applied = []
+    cursor = connection.cursor()
+    try:
+        version = current_version(cursor)
+        for number, description, apply in MIGRATIONS:
+            if number <= version or (target is not None and number > target):
+                continue
+            apply(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (number, description)
+            )
+            connection.commit()
+            applied.append(number)
+    finally:
+        cursor.close()
+    return applied
+
+
+def _week_bounds():
+    today = date.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    return start_of_week, start_of_week + timedelta(days=6)
+
+
+# Every read/update query the apps run, with representative parameters for EXPLAIN.
+# Plain INSERTs never scan. Keep this list in step with the code when adding a query.
+def checked_queries():
+    start_of_week, end_of_week = _week_bounds()
+    return [
+        ("user by id", PROFILE_QUERY, (1,)),
+        ("email exists", "SELECT id FROM users WHERE email = %s", ("user@example.com",)),
+        ("login lookup", LOGIN_QUERY, ("user@example.com",)),
+        ("update goal", "UPDATE users SET goal = %s WHERE id = %s", ("goal", 1)),
+        ("has workouts", "SELECT 1 FROM workouts WHERE user_id = %s LIMIT 1", (1,)),
+        ("week rollup", WEEK_ROLLUP_QUERY, (1, start_of_week)),
+        ("analytics load", LOAD_QUERY, (1,)),
+        ("rollover weekly logs", WEEKLY_LOGS_QUERY, (end_of_week, start_of_week)),
+        ("rollover feedback candidates", FEEDBACK_CANDIDATES_QUERY, (start_of_week, 0, 500)),
+        ("journaled keys", "SELECT client_key FROM workouts WHERE client_key IN (%s)", ("0" * 32,)),
+        ("history first page",) + history_page_query(1),
+        ("history next page",) + history_page_query(1, before=(end_of_week, 1000)),
+        ("cached feedback", FEEDBACK_LOOKUP_QUERY, (1, start_of_week, "0" * 64)),
+        ("history newer rows", HISTORY_NEWER_QUERY, (1, start_of_week, start_of_week, 1000, 200)),
+    ]
+
+
+def check_query_plans(connection):
+    """
+    EXPLAIN each checked query and return the ones that do a full table scan.
+    Run against a seeded database - the optimizer may prefer a scan on near-empty tables.
+    """
+    failures = []
+    cursor = connection.cursor(dictionary=True)
+    try:
+        for name, query, params in checked_queries():
+            cursor.execute("EXPLAIN " + query, params)
+            for row in cursor.fetchall():
+                if row.get('type') == 'ALL':
+                    failures.append((name, row.get('table'), row.get('rows')))
+    finally:
+        cursor.close()
+    return failures
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "migrate"
+    connection = get_pool().connect()
+    try:
+        if command == "migrate":
+            applied = migrate(connection)
+            print(f"Applied migrations: {applied}" if applied else "Schema is up to date.")
+        elif command == "version":
+            cursor = connection.cursor()
+            print(current_version(cursor))
+            cursor.close()
+        elif command == "check":
+            failures = check_query_plans(connection)
+            for name, table, rows in failures:
+                print(f"FULL SCAN: {name} on {table} (~{rows} rows)")
+            if failures:
+                return 1
+            print("All queries use an index.")
+        else:
+            print("Usage: python schema.py [migrate|check|version]")
+            return 2
+    except mysql.connector.Error as err:
+        print(f"Database error: {err}")
+        return 1
+    finally:
+        connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,142 @@
+import threading
+
+
+class CallAbandoned(Exception):
+    """Raised to callers waiting on a streamed call whose leader stopped reading it."""
+
+
+class _Flight:
+    """
+    One in-flight call: its result or error, plus any pieces streamed so far.
+    """
+
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.pieces = []
+        self.finished = False
+        self._changed = threading.Condition()
+
+    def publish(self, piece):
+        with self._changed:
+            self.pieces.append(piece)
+            self._changed.notify_all()
+
+    def finish(self, result=None, error=None):
+        with self._changed:
+            self.result = result
+            self.error = error
+            self.finished = True
+            self._changed.notify_all()
+
+    def wait(self):
+        with self._changed:
+            while not self.finished:
+                self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def follow(self):
+        """
+        Yield every piece from the start of the stream, then new ones as they arrive.
+        """
+        sent = 0
+        while True:
+            with self._changed:
+                while sent == len(self.pieces) and not self.finished:
+                    self._changed.wait()
+                pieces = self.pieces[sent:]
+                finished = self.finished
+            sent += len(pieces)
+            yield from pieces
+            if finished:
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls within the process.
+
+    The first caller for a key runs the call; callers arriving while it is in flight
+    wait for it and receive the same result, error or stream. Nothing is kept once
+    the call finishes, so this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def _join(self, key):
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _leave(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key, func):
+        """
+        Return func(), sharing one call among concurrent callers with the same key.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            return flight.wait()
+
+        try:
+            result = func()
+        except Exception as e:
+            self._leave(key, flight)
+            flight.finish(error=e)
+            raise
+        self._leave(key, flight)
+        flight.finish(result=result)
+        return result
+
+    def stream(self, key, func):
+        """
+        Yield from func(), sharing one stream among concurrent callers with the same key.
+        Callers that join late first receive the pieces already produced.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            yield from flight.follow()
+            return
+
+        error = CallAbandoned("The shared call was abandoned before it finished.")
+        source = None
+        try:
+            source = func()
+            for piece in source:
+                flight.publish(piece)
+                yield piece
+            error = None
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Closing this generator early closes the underlying stream too
+            close = getattr(source, "close", None) if source is not None else None
+            if close is not None:
+                close()
+            self._leave(key, flight)
+            flight.finish(error=error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
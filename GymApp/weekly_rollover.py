@@ -0,0 +1,224 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+import openai
+
+from db import get_pool
+from feedback import build_feedback_prompt, feedback_cache, feedback_cache_key
+from llm import llm_feedback_text
+from workout_log import decode_workout_log
+
+# Weekly rollover batch job.
+#
+#   python weekly_rollover.py                      # last completed week
+#   python weekly_rollover.py --week 2024-03-04    # a specific week (its Monday)
+#
+# Step 1 writes every active user's weekly log with one INSERT ... SELECT over workout_rollups.
+# Step 2 generates missing or stale feedback with bounded concurrency and a request-rate limit.
+# Progress is checkpointed after each chunk of users, so an interrupted run resumes where it stopped.
+
+# Builds the version 2 workout_log (see workout_log.py) for every user in one statement
+WEEKLY_LOGS_QUERY = """
+    INSERT INTO weeklyworkouts (user_id, week_start, week_end, workout_log)
+    SELECT user_id, week_start, %s,
+           CONCAT(
+               '{"v":2,"x":[', GROUP_CONCAT(JSON_QUOTE(exercise) ORDER BY exercise),
+               '],"s":[', GROUP_CONCAT(total_sets ORDER BY exercise),
+               '],"r":[', GROUP_CONCAT(total_reps ORDER BY exercise),
+               '],"vol":[', GROUP_CONCAT(volume ORDER BY exercise),
+               '],"n":[', GROUP_CONCAT(entry_count ORDER BY exercise),
+               '],"d":[', GROUP_CONCAT(BIT_COUNT(day_mask) ORDER BY exercise),
+               '],"i":[', GROUP_CONCAT(CONCAT_WS(',', intensity_low, intensity_medium,
+                                                 intensity_high, intensity_other) ORDER BY exercise),
+               ']}'
+           )
+    FROM workout_rollups
+    WHERE week_start = %s
+    GROUP BY user_id, week_start
+    ON DUPLICATE KEY UPDATE week_end = VALUES(week_end), workout_log = VALUES(workout_log)
+"""
+
+# Users with a log for the week, with their goal and the inputs of any stored feedback
+FEEDBACK_CANDIDATES_QUERY = """
+    SELECT w.user_id, u.goal, w.workout_log, f.input_hash
+    FROM weeklyworkouts w
+    JOIN users u ON u.id = w.user_id
+    LEFT JOIN weeklyfeedback f ON f.user_id = w.user_id AND f.week_start = w.week_start
+    WHERE w.week_start = %s AND w.user_id > %s
+    ORDER BY w.user_id
+    LIMIT %s
+"""
+
+
+class RateLimiter:
+    """
+    Spaces out requests to at most `per_minute`, shared by every worker thread.
+    pause() pushes the next slot back for everyone after the API reports a rate limit.
+    """
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def previous_week_start(today=None):
+    today = today or date.today()
+    return today - timedelta(days=today.weekday() + 7)
+
+
+def load_checkpoint(path, week_start):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("week_start") == week_start:
+            return checkpoint
+    return {"week_start": week_start, "logs_done": False, "last_user_id": 0}
+
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def write_weekly_logs(connection, week_start, week_end):
+    """
+    Write every active user's weekly log in a single set-based statement.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION group_concat_max_len = 1048576")
+        cursor.execute(WEEKLY_LOGS_QUERY, (week_end, week_start))
+        connection.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def generate_feedback(limiter, user_id, goal, summary, week_start, week_end, max_retries=5):
+    """
+    Generate and store one user's feedback, backing off when the API rate-limits us.
+    """
+    prompt = build_feedback_prompt(goal, summary)
+    for attempt in range(max_retries + 1):
+        limiter.wait()
+        try:
+            feedback = llm_feedback_text(prompt)
+            break
+        except openai.error.RateLimitError:
+            if attempt == max_retries:
+                raise
+            limiter.pause(min(60, 2 ** attempt))
+
+    connection = get_pool().connect()
+    try:
+        feedback_cache.put(connection, user_id, week_start, week_end,
+                           feedback_cache_key(goal, summary), feedback)
+    finally:
+        connection.close()
+
+
+def run(week_start, checkpoint_path=None, concurrency=8, per_minute=300, chunk_size=500, skip_feedback=False):
+    week_end = week_start + timedelta(days=6)
+    week_start_text = week_start.strftime('%Y-%m-%d')
+    week_end_text = week_end.strftime('%Y-%m-%d')
+    checkpoint = load_checkpoint(checkpoint_path, week_start_text)
+
+    connection = get_pool().connect()
+    try:
+        if not checkpoint["logs_done"]:
+            started = time.monotonic()
+            written = write_weekly_logs(connection, week_start_text, week_end_text)
+            print(f"Weekly logs written ({written} rows affected) in {time.monotonic() - started:.1f}s")
+            checkpoint["logs_done"] = True
+            save_checkpoint(checkpoint_path, checkpoint)
+
+        if skip_feedback:
+            return 0
+
+        limiter = RateLimiter(per_minute)
+        generated = failed = 0
+        cursor = connection.cursor(dictionary=True)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                cursor.execute(FEEDBACK_CANDIDATES_QUERY, (week_start_text, checkpoint["last_user_id"], chunk_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+
+                futures = []
+                for row in rows:
+                    summary = decode_workout_log(row['workout_log'])
+                    if not summary or row['input_hash'] == feedback_cache_key(row['goal'], summary):
+                        continue
+                    futures.append(executor.submit(
+                        generate_feedback, limiter, row['user_id'], row['goal'], summary,
+                        week_start_text, week_end_text
+                    ))
+
+                for future in futures:
+                    try:
+                        future.result()
+                        generated += 1
+                    except Exception as e:
+                        failed += 1
+                        print(f"Feedback failed: {e}")
+
+                checkpoint["last_user_id"] = rows[-1]['user_id']
+                save_checkpoint(checkpoint_path, checkpoint)
+                print(f"Through user {checkpoint['last_user_id']}: {generated} generated, {failed} failed")
+        cursor.close()
+    finally:
+        connection.close()
+
+    # Failed users are left for the next run; completed ones are skipped by input hash
+    checkpoint["last_user_id"] = 0 if failed else checkpoint["last_user_id"]
+    save_checkpoint(checkpoint_path, checkpoint)
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write weekly logs and feedback for every active user.")
+    parser.add_argument("--week", help="Monday of the week to roll over (default: last completed week)")
+    parser.add_argument("--checkpoint", default="weekly_rollover.checkpoint.json")
+    parser.add_argument("--concurrency", type=int, default=8, help="Feedback requests in flight at once")
+    parser.add_argument("--rpm", type=int, default=300, help="Maximum feedback requests per minute")
+    parser.add_argument("--chunk", type=int, default=500, help="Users per checkpointed chunk")
+    parser.add_argument("--skip-feedback", action="store_true")
+    args = parser.parse_args(argv)
+
+    week_start = datetime.strptime(args.week, '%Y-%m-%d').date() if args.week else previous_week_start()
+    week_start -= timedelta(days=week_start.weekday())
+
+    try:
+        return run(week_start, args.checkpoint, args.concurrency, args.rpm, args.chunk, args.skip_feedback)
+    except mysql.connector.Error as err:
+        print(f"Database error: {err}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
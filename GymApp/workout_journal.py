@@ -0,0 +1,283 @@
+import logging
+import sqlite3
+import threading
+import uuid
+
+# Local SQLite journal for workouts logged on the device.
+# Submissions are written here first and drained to MySQL by a background sync thread,
+# so logging works without a connection and nothing is lost when the gym Wi-Fi drops.
+# The MySQL side is imported on the sync thread, keeping it off the app's startup path.
+# Entries the server keeps rejecting are moved to dead_workouts so they cannot block the rest;
+# requeue_dead() puts them back, e.g. once the server side has been fixed.
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_COLUMNS = "id, client_key, user_id, date, exercise, sets, reps, intensity, attempts, last_error"
+
+
+class WorkoutJournal:
+    """
+    Device-local queue of workouts waiting to be synced.
+    Every entry carries a client_key so a batch that is resent after a lost
+    acknowledgement is not inserted twice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pending_workouts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                client_key TEXT NOT NULL UNIQUE,
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                exercise TEXT NOT NULL,
+                sets INTEGER NOT NULL,
+                reps INTEGER NOT NULL,
+                intensity TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS dead_workouts (
+                id INTEGER PRIMARY KEY,
+                client_key TEXT NOT NULL UNIQUE,
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                exercise TEXT NOT NULL,
+                sets INTEGER NOT NULL,
+                reps INTEGER NOT NULL,
+                intensity TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT
+            )
+        """)
+        self._conn.commit()
+
+    def add(self, user_id, row):
+        """
+        Journal a validated (date, exercise, sets, reps, intensity) row. Returns its client key.
+        """
+        client_key = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pending_workouts (client_key, user_id, date, exercise, sets, reps, intensity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (client_key, user_id) + tuple(row)
+            )
+            self._conn.commit()
+        return client_key
+
+    def pending_count(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                return self._conn.execute("SELECT COUNT(*) FROM pending_workouts").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pending_workouts WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+
+    def next_batch(self, limit):
+        """
+        Oldest journaled entries as (id, client_key, user_id, date, exercise, sets, reps, intensity, attempts).
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, client_key, user_id, date, exercise, sets, reps, intensity, attempts "
+                "FROM pending_workouts ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+
+    def remove(self, ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM pending_workouts WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def mark_failed(self, ids, error):
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE pending_workouts SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                [(error, i) for i in ids]
+            )
+            self._conn.commit()
+
+    def bury(self, entry_id, error):
+        """
+        Move an entry the server rejects to dead_workouts, where it is kept but no longer synced.
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE pending_workouts SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                    (error, entry_id)
+                )
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO dead_workouts ({JOURNAL_COLUMNS}) "
+                    f"SELECT {JOURNAL_COLUMNS} FROM pending_workouts WHERE id = ?", (entry_id,)
+                )
+                self._conn.execute("DELETE FROM pending_workouts WHERE id = ?", (entry_id,))
+
+    def dead_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_workouts").fetchone()[0]
+
+    def requeue_dead(self):
+        """
+        Move every entry in dead_workouts back to pending_workouts with its attempts reset.
+        Entries keep their ids, so they sync in the order they were logged. Returns the count.
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    f"INSERT OR IGNORE INTO pending_workouts ({JOURNAL_COLUMNS}) "
+                    "SELECT id, client_key, user_id, date, exercise, sets, reps, intensity, 0, NULL "
+                    "FROM dead_workouts"
+                )
+                return self._conn.execute("DELETE FROM dead_workouts").rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JournalSync:
+    """
+    Background thread that drains a WorkoutJournal to MySQL in batches.
+
+    interval    - seconds between sync attempts while idle
+    batch_size  - journaled entries sent per transaction
+    max_backoff - ceiling for the retry delay after failures
+    max_attempts - once a batch has failed this many times it is retried one entry at a
+                   time, and entries the server rejects outright are moved to dead_workouts
+    on_change   - called from the sync thread after each batch with the pending count
+    """
+
+    def __init__(self, journal, interval=15, batch_size=100, max_backoff=300, max_attempts=5, on_change=None):
+        self.journal = journal
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.on_change = on_change
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-sync", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Sync now instead of waiting for the next interval, e.g. right after a submission."""
+        self._wake.set()
+
+    def requeue_dead(self):
+        """Give buried entries another chance and sync them now. Returns how many were requeued."""
+        requeued = self.journal.requeue_dead()
+        if requeued:
+            self.wake()
+        return requeued
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                while self.sync_once():
+                    pass
+                failures = 0
+                self.last_error = None
+                delay = self.interval
+            except Exception as err:
+                # Keep the thread alive whatever went wrong; the journal still holds the entries
+                failures += 1
+                self.last_error = str(err)
+                logger.exception("Workout journal sync failed (attempt %d)", failures)
+                delay = min(self.max_backoff, self.interval * 2 ** min(failures, 10))
+
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def sync_once(self):
+        """
+        Send one batch. Returns True if a batch was synced and more may be waiting.
+        """
+        import mysql.connector
+
+        from db import get_pool
+        from workouts import insert_journaled_workouts
+
+        batch = self.journal.next_batch(self.batch_size)
+        if not batch:
+            return False
+        if max(entry[-1] for entry in batch) >= self.max_attempts:
+            return self._sync_one_by_one(batch)
+
+        ids = [entry[0] for entry in batch]
+        connection = get_pool().connect()
+        cursor = connection.cursor()
+        try:
+            insert_journaled_workouts(cursor, [entry[1:-1] for entry in batch])
+            connection.commit()
+        except Exception as err:
+            self.journal.mark_failed(ids, str(err))
+            try:
+                connection.rollback()
+            except mysql.connector.Error:
+                pass
+            raise
+        finally:
+            cursor.close()
+            connection.close()
+
+        self.journal.remove(ids)
+        if self.on_change:
+            self.on_change(self.journal.pending_count())
+        return len(batch) == self.batch_size
+
+    def _sync_one_by_one(self, batch):
+        """
+        Send a batch that keeps failing one entry per transaction, so a single bad entry
+        cannot hold back the others. Entries whose data the server rejects are buried; any
+        other failure stops the pass and is raised for the usual backoff. That includes
+        ProgrammingError, which also covers server setup problems (a missing column or
+        privilege) that would otherwise bury every entry.
+        """
+        import mysql.connector
+        from mysql.connector import errors
+
+        from db import get_pool
+        from workouts import insert_journaled_workouts
+
+        connection = get_pool().connect()
+        try:
+            for entry in batch:
+                cursor = connection.cursor()
+                try:
+                    insert_journaled_workouts(cursor, [entry[1:-1]])
+                    connection.commit()
+                except (errors.DataError, errors.IntegrityError, ValueError) as err:
+                    connection.rollback()
+                    logger.warning("Moving journaled workout %s to dead_workouts: %s", entry[1], err)
+                    self.journal.bury(entry[0], str(err))
+                    continue
+                except mysql.connector.Error as err:
+                    self.journal.mark_failed([entry[0]], str(err))
+                    raise
+                finally:
+                    cursor.close()
+                self.journal.remove([entry[0]])
+        finally:
+            connection.close()
+
+        if self.on_change:
+            self.on_change(self.journal.pending_count())
+        return len(batch) == self.batch_size
@@ -0,0 +1,112 @@
+import json
+
+from rollups import INTENSITY_LEVELS, intensity_bucket
+
+# Compact, versioned encoding for weeklyworkouts.workout_log.
+#
+# Version 2 stores the week's per-exercise rollup column by column:
+#   {"v": 2,
+#    "x": [exercise, ...],          exercise dictionary; every other column is aligned to it
+#    "s": [total_sets, ...],
+#    "r": [total_reps, ...],
+#    "vol": [volume, ...],
+#    "n": [entry_count, ...],
+#    "d": [session_count, ...],
+#    "i": [low, medium, high, other, low, ...]}   intensity counts, INTENSITY_LEVELS order per exercise
+#
+# Key names and user ids are no longer repeated per row. Older logs are plain JSON lists,
+# either of raw workout rows or of rollup dicts; decode_workout_log reads all three.
+
+WORKOUT_LOG_VERSION = 2
+
+UPSERT_WEEKLY_LOG = """
+    INSERT INTO weeklyworkouts (user_id, week_start, week_end, workout_log)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE workout_log = VALUES(workout_log)
+"""
+
+
+def encode_workout_log(summary):
+    """
+    Encode a weekly summary (as returned by rollups.fetch_week_rollup) as a version 2 log.
+    """
+    intensity = []
+    for w in summary:
+        intensity.extend(int(w['intensity'].get(level, 0)) for level in INTENSITY_LEVELS)
+    return json.dumps({
+        "v": WORKOUT_LOG_VERSION,
+        "x": [w['exercise'] for w in summary],
+        "s": [int(w['total_sets']) for w in summary],
+        "r": [int(w['total_reps']) for w in summary],
+        "vol": [int(w['volume']) for w in summary],
+        "n": [int(w['entry_count']) for w in summary],
+        "d": [int(w['session_count']) for w in summary],
+        "i": intensity,
+    }, separators=(',', ':'))
+
+
+def _decode_v2(log):
+    levels = len(INTENSITY_LEVELS)
+    intensity = log['i']
+    return [
+        {
+            "exercise": exercise,
+            "total_sets": log['s'][k],
+            "total_reps": log['r'][k],
+            "volume": log['vol'][k],
+            "entry_count": log['n'][k],
+            "session_count": log['d'][k],
+            "intensity": dict(zip(INTENSITY_LEVELS, intensity[k * levels:(k + 1) * levels])),
+        }
+        for k, exercise in enumerate(log['x'])
+    ]
+
+
+def _summarize_legacy_rows(rows):
+    """
+    Aggregate legacy SELECT * workout rows into the weekly summary shape.
+    """
+    totals = {}
+    for row in rows:
+        entry = totals.setdefault(row['exercise'], {
+            "exercise": row['exercise'],
+            "total_sets": 0,
+            "total_reps": 0,
+            "volume": 0,
+            "entry_count": 0,
+            "days": set(),
+            "intensity": {level: 0 for level in INTENSITY_LEVELS},
+        })
+        sets, reps = int(row['sets']), int(row['reps'])
+        entry["total_sets"] += sets
+        entry["total_reps"] += reps
+        entry["volume"] += sets * reps
+        entry["entry_count"] += 1
+        entry["days"].add(row.get('date'))
+        entry["intensity"][intensity_bucket(row.get('intensity'))] += 1
+
+    summary = []
+    for exercise in sorted(totals):
+        entry = totals[exercise]
+        entry["session_count"] = len(entry.pop("days"))
+        summary.append(entry)
+    return summary
+
+
+def decode_workout_log(value):
+    """
+    Decode any stored workout_log into the weekly summary shape.
+    Reads version 2 logs, JSON lists of rollup dicts and legacy JSON lists of raw workout rows.
+    """
+    if not value:
+        return []
+    log = json.loads(value)
+
+    if isinstance(log, dict):
+        if log.get('v') != WORKOUT_LOG_VERSION:
+            raise ValueError(f"Unsupported workout_log version: {log.get('v')}")
+        return _decode_v2(log)
+
+    if log and 'total_sets' in log[0]:
+        return log
+    return _summarize_legacy_rows(log)
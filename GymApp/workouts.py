@@ -0,0 +1,113 @@
+from datetime import datetime
+
+from rollups import apply_to_rollups
+
+# Validation and inserts for logged workouts, shared by the web routes and the Kivy client.
+
+MAX_BATCH_SIZE = 500
+
+INSERT_WORKOUT = """
+    INSERT INTO workouts (user_id, date, exercise, sets, reps, intensity)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Journaled entries carry a client_key; resending one that already landed is a no-op
+INSERT_JOURNALED_WORKOUT = """
+    INSERT INTO workouts (client_key, user_id, date, exercise, sets, reps, intensity)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = id
+"""
+
+
+def _whole_number(value, from_json):
+    """
+    Return value as an int, or raise ValueError. Form fields are strings and are parsed;
+    JSON values must already be numbers, so true or 3.7 is rejected rather than changed.
+    """
+    if not from_json:
+        return int(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(value)
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+
+def validate_workout_entry(entry, from_json=False):
+    """
+    Check one workout entry and return (row, errors).
+    row is (date, exercise, sets, reps, intensity) when the entry is valid, otherwise None.
+    Pass from_json=True for entries decoded from a JSON body, whose counts must be JSON integers.
+    """
+    errors = []
+    if not isinstance(entry, dict):
+        return None, ["Entry must be an object."]
+
+    exercise = str(entry.get('exercise') or '').strip()
+    intensity = str(entry.get('intensity') or '').strip()
+    if not exercise:
+        errors.append("exercise is required.")
+    elif len(exercise) > 100:
+        errors.append("exercise must be at most 100 characters.")
+    if not intensity:
+        errors.append("intensity is required.")
+    elif len(intensity) > 50:
+        errors.append("intensity must be at most 50 characters.")
+
+    counts = {}
+    for field in ('sets', 'reps'):
+        try:
+            counts[field] = _whole_number(entry.get(field), from_json)
+            if counts[field] <= 0:
+                errors.append(f"{field} must be a positive number.")
+        except (TypeError, ValueError):
+            errors.append(f"{field} must be a whole number.")
+
+    workout_date = entry.get('date') or datetime.now().strftime('%Y-%m-%d')
+    try:
+        workout_date = datetime.strptime(str(workout_date), '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        errors.append("date must be in YYYY-MM-DD format.")
+
+    if errors:
+        return None, errors
+    return (workout_date, exercise, counts['sets'], counts['reps'], intensity), []
+
+
+def insert_workouts(cursor, user_id, rows):
+    """
+    Insert validated workout rows with a single executemany and add them to the weekly rollup.
+    The caller owns the transaction and commits.
+    """
+    if not rows:
+        return
+    cursor.executemany(INSERT_WORKOUT, [(user_id,) + tuple(row) for row in rows])
+    apply_to_rollups(cursor, user_id, rows)
+
+
+def insert_journaled_workouts(cursor, entries):
+    """
+    Insert (client_key, user_id, date, exercise, sets, reps, intensity) entries synced
+    from a device journal. Entries already inserted under the same client_key are skipped,
+    and only new entries are added to the weekly rollup.
+    """
+    if not entries:
+        return
+
+    # Drop entries that landed before a lost acknowledgement, so the rollup counts them once
+    keys = [entry[0] for entry in entries]
+    cursor.execute(
+        f"SELECT client_key FROM workouts WHERE client_key IN ({', '.join(['%s'] * len(keys))})",
+        keys
+    )
+    existing = {row[0] if not isinstance(row, dict) else row['client_key'] for row in cursor.fetchall()}
+    entries = [tuple(entry) for entry in entries if entry[0] not in existing]
+    if not entries:
+        return
+
+    cursor.executemany(INSERT_JOURNALED_WORKOUT, entries)
+    by_user = {}
+    for client_key, user_id, *row in entries:
+        by_user.setdefault(user_id, []).append(row)
+    for user_id, rows in by_user.items():
+        apply_to_rollups(cursor, user_id, rows)